@@ -1,7 +1,15 @@
-from .simple_json import simple_json_from_html_string
+from .node_pool import AsyncNodeWorkerPool, NodeWorkerError, NodeWorkerPool, NodeWorkerTimeoutError
+from .simple_json import ArticleResult, simple_json_from_html_string, simple_json_from_html_string_async, simple_json_from_html_strings
 from .simple_tree import simple_tree_from_html_string
 
 __all__ = [
+    'ArticleResult',
+    'AsyncNodeWorkerPool',
+    'NodeWorkerError',
+    'NodeWorkerPool',
+    'NodeWorkerTimeoutError',
     'simple_json_from_html_string',
+    'simple_json_from_html_string_async',
+    'simple_json_from_html_strings',
     'simple_tree_from_html_string',
 ]
@@ -5,11 +5,31 @@
 """
 
 import argparse
+import glob
 import json
+import os
+import random
+import re
 import sys
+import time
 
 from .__version__ import __version__
-from .simple_json import simple_json_from_html_string, have_node
+from .simple_json import article_fields, batch_results, digest_hash, simple_json_from_html_string, have_node
+from .simple_tree import parsers
+
+
+# Extensions of the files read from input directories
+HTML_EXTENSIONS = (".html", ".htm")
+
+
+class VersionAction(argparse.Action):
+    """Show the version and exit, only checking for Node.js when asked to."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help=None):  # pylint: disable=redefined-builtin
+        super().__init__(option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser.exit(message=f"{__version__} (Readability.js supported: {'yes' if have_node() else 'no'})\n")
 
 
 def main():
@@ -17,6 +37,13 @@ def main():
         description="Extract article data from a HTML file using either Mozilla's Readability.js package or a simplified python-only alternative.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        metavar="INPUT",
+        help="HTML files, directories of .html and .htm files or glob patterns to extract in one batch, instead of a single --input-file. "
+             "Each article is written as an NDJSON line to --output-file, or as a JSON file in --output-dir.",
+    )
     parser.add_argument(
         "-i",
         "--input-file",
@@ -35,6 +62,12 @@ def main():
         action="store_true",
         help="Add a 'data-content-digest' attribute containing a SHA256-based digest of the element's contents to each HTML element in the plain_content output.",
     )
+    parser.add_argument(
+        "--digest-algorithm",
+        type=digest_algorithm_argument,
+        metavar="ALGORITHM",
+        help="Use this hashlib ALGORITHM for the content digests instead of SHA256, e.g. 'blake2b' or 'blake2b-16' for a 16 byte BLAKE2b digest. Implies --content-digests.",
+    )
     parser.add_argument(
         "-n",
         "--node-indexes",
@@ -47,35 +80,75 @@ def main():
         action="store_true",
         help="Use the pure-python 'plain_html' parser included in this project rather than Mozilla's Readability.js.",
     )
+    parser.add_argument(
+        "--parser",
+        choices=parsers(),
+        default="html5lib",
+        help="HTML parser used by the pure-python parser. 'lxml' is several times faster than 'html5lib' but less faithful to how browsers parse broken HTML.",
+    )
+    parser.add_argument(
+        "-f",
+        "--fields",
+        nargs="+",
+        choices=article_fields(),
+        metavar="FIELD",
+        help=f"Only extract these article fields, skipping the work needed for the others. Choose from: {', '.join(article_fields())}. All fields are extracted by default. Give any INPUTs before this option, as it takes all of the values which follow it.",
+    )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Read a stream of NDJSON records of the form {\"id\": ..., \"html\": ...} from --input-file and write one NDJSON line per article to --output-file as soon as it is ready. "
+             "Up to a few documents per worker are held in memory at a time.",
+    )
+    parser.add_argument(
+        "--file-list",
+        help="Path to a file listing one HTML file to extract per line, as for INPUT.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="In batch mode, write each article as a JSON file in this directory rather than as NDJSON to --output-file.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="Number of documents to extract in parallel in batch mode. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=1,
+        help="Number of documents sent to a worker at a time in batch mode.",
+    )
     parser.add_argument(
         "-V",
         "--version",
         help="Show version and exit",
-        action="version",
-        version=f"{__version__} (Readability.js supported: {'yes' if have_node() else 'no'})",
+        action=VersionAction,
     )
 
     args = parser.parse_args()
 
+    if args.ndjson and args.output_dir is not None:
+        parser.error("--output-dir cannot be used with --ndjson")
+    if args.ndjson:
+        input_file = open_input_file(args.input_file)
+        try:
+            sys.exit(0 if batch(args, read_records(input_file)) else 1)
+        finally:
+            input_file.close()
+    if args.inputs or args.file_list:
+        sys.exit(0 if batch(args, read_files(input_paths(args.inputs, args.file_list))) else 1)
+
     # Open input file or stream
-    if args.input_file == "-":
-        if hasattr(sys.stdin, "reconfigure"):
-            sys.stdin.reconfigure(encoding="utf-8", errors="replace")
-        input_file = sys.stdin
-    else:
-        input_file = open(args.input_file, encoding="utf-8", errors="replace")  # pylint: disable=consider-using-with
+    input_file = open_input_file(args.input_file)
 
     # Read from input then close if appropriate
     html = input_file.read()
     if not input_file.isatty():
         input_file.close()
 
-    article = simple_json_from_html_string(
-        html,
-        content_digests=args.content_digests,
-        node_indexes=args.node_indexes,
-        use_readability=(not args.use_python_parser),
-    )
+    article = simple_json_from_html_string(html, **extraction_options(args))
 
     # Open output file or stream
     if args.output_file == "-":
@@ -89,5 +162,190 @@ def main():
         output_file.close()
 
 
+def digest_algorithm_argument(algorithm):
+    """Check that the content digest algorithm is supported when the arguments are parsed."""
+    try:
+        digest_hash(algorithm)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+    return algorithm
+
+
+def open_input_file(input_file):
+    if input_file == "-":
+        if hasattr(sys.stdin, "reconfigure"):
+            sys.stdin.reconfigure(encoding="utf-8", errors="replace")
+        return sys.stdin
+    return open(input_file, encoding="utf-8", errors="replace")  # pylint: disable=consider-using-with
+
+
+def extraction_options(args):
+    return {
+        "content_digests": args.digest_algorithm or args.content_digests,
+        "node_indexes": args.node_indexes,
+        "use_readability": not args.use_python_parser,
+        "parser": args.parser,
+        "fields": args.fields,
+    }
+
+
+def input_paths(inputs, file_list=None):
+    """Yield (path, output name) for each HTML file given as a file, directory or glob pattern."""
+    if file_list:
+        with open(file_list, encoding="utf-8") as paths:
+            inputs = list(inputs) + [path.strip() for path in paths if path.strip()]
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for directory, subdirectories, filenames in os.walk(pattern):
+                subdirectories.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(HTML_EXTENSIONS):
+                        path = os.path.join(directory, filename)
+                        yield path, os.path.relpath(path, pattern)
+        elif any(c in pattern for c in "*?[") and not os.path.exists(pattern):
+            # Name matches relative to the directories before the first wildcard, as for directories
+            base = os.path.dirname(re.split(r"[*?[]", pattern, maxsplit=1)[0]) or os.curdir
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    yield path, os.path.relpath(path, base)
+        else:
+            yield pattern, os.path.basename(pattern)
+
+
+def read_files(paths):
+    """Yield (path, output name, HTML) for each of paths, or the error in place of the HTML if a file cannot be read."""
+    for path, name in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as h:
+                yield path, name, h.read()
+        except OSError as e:
+            yield path, name, e
+
+
+def read_records(input_file):
+    """Yield (id, None, HTML) for each NDJSON record in input_file, or the error in place of the HTML if a line is not a valid record.
+        Records without an id are identified by {"line": <line number>}, which cannot be mistaken for the id of another record.
+    """
+    for line_number, line in enumerate(input_file, 1):
+        if not line.strip():
+            continue
+        document_id = {"line": line_number}
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("record is not a JSON object")
+            document_id = record.get("id", document_id)
+            if not isinstance(record.get("html"), str):
+                raise ValueError('"html" is missing or not a string')
+        except ValueError as e:
+            yield document_id, None, ValueError(f"Invalid NDJSON record: {e}")
+        else:
+            yield document_id, None, record["html"]
+
+
+def batch(args, inputs):
+    """Extract the (id, output name, HTML) inputs in parallel, writing the articles as they are ready and a summary to stderr.
+        Returns whether all of the documents were extracted.
+    """
+    # Ids and output paths of the documents being extracted, by batch index
+    documents = {}
+    failures = 0
+    # Output files which have been claimed by an input, so that inputs with the same name cannot overwrite each other
+    output_paths = set()
+
+    def read_documents():
+        nonlocal failures
+        index = 0
+        for document_id, name, html in inputs:
+            output_path = None
+            if args.output_dir is not None and not isinstance(html, Exception):
+                output_path = os.path.normpath(os.path.join(args.output_dir, os.path.splitext(name)[0] + ".json"))
+                if output_path in output_paths:
+                    html = FileExistsError(f"Output file {output_path} is already used by another input")
+                output_paths.add(output_path)
+            if isinstance(html, Exception):
+                failures += 1
+                write_result(document_id, output_path, html)
+            else:
+                documents[index] = (document_id, output_path)
+                index += 1
+                yield html
+
+    output_file = None
+    if args.output_dir is None:
+        output_file = sys.stdout if args.output_file == "-" else open(args.output_file, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    def write_line(result):
+        output_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        if output_file is sys.stdout:
+            # Pass each result straight on when streaming to another process
+            output_file.flush()
+
+    def write_result(document_id, output_path, article):
+        if isinstance(article, Exception):
+            error = f"{type(article).__name__}: {article}"
+            if output_file is not None:
+                write_line({"id": document_id, "error": error})
+            else:
+                print(f"{document_id}: {error}", file=sys.stderr)
+        elif output_file is not None:
+            write_line({"id": document_id, "article": article})
+        else:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "w", encoding="utf-8") as h:
+                json.dump(article, h, ensure_ascii=False)
+
+    start = time.perf_counter()
+    latencies = LatencySample()
+    try:
+        results = batch_results(read_documents(), args.workers, args.chunksize, ordered=False, return_exceptions=True, **extraction_options(args))
+        for index, article, seconds in results:
+            document_id, output_path = documents.pop(index)
+            if isinstance(article, Exception):
+                failures += 1
+            else:
+                latencies.add(seconds)
+            write_result(document_id, output_path, article)
+    finally:
+        if output_file is not None and output_file is not sys.stdout:
+            output_file.close()
+    print(batch_summary(latencies.count + failures, failures, time.perf_counter() - start, latencies.values), file=sys.stderr)
+    return not failures
+
+
+class LatencySample:
+    """A uniform random sample of at most size latencies (a reservoir sample), so that percentiles
+        can be estimated for an endless stream of documents in a fixed amount of memory.
+    """
+
+    def __init__(self, size=10000):
+        self.size = size
+        self.count = 0
+        self.values = []
+        self.random = random.Random(0)
+
+    def add(self, value):
+        self.count += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            index = self.random.randrange(self.count)
+            if index < self.size:
+                self.values[index] = value
+
+
+def batch_summary(count, failures, seconds, latencies):
+    latencies = sorted(latencies)
+    summary = f"Extracted {count - failures} of {count} documents in {seconds:.1f}s ({count / seconds if seconds else 0:.1f} docs/s), {failures} failed"
+    if latencies:
+        summary += f", latency p50 {percentile(latencies, 0.5) * 1000:.0f}ms p99 {percentile(latencies, 0.99) * 1000:.0f}ms"
+    return summary
+
+
+def percentile(ordered_values, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    return ordered_values[min(len(ordered_values) - 1, int(fraction * len(ordered_values)))]
+
+
 if __name__ == "__main__":
     main()
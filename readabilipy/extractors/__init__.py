@@ -1,8 +1,14 @@
-from .extract_date import extract_date, ensure_iso_date_format
+from .extract_date import extract_date, ensure_iso_date_format, ensure_iso_date_formats
+from .extract_element import parse_html, parse_html_head
+from .extract_metadata import extract_head_metadata
 from .extract_title import extract_title
 
 __all__ = [
     'extract_date',
+    'extract_head_metadata',
     'extract_title',
     'ensure_iso_date_format',
+    'ensure_iso_date_formats',
+    'parse_html',
+    'parse_html_head',
 ]
@@ -1,26 +1,33 @@
-from datetime import datetime
-from .extract_element import extract_element
+import re
+from datetime import datetime, timedelta, timezone
+from .extract_element import CompiledXPaths, extract_element
+
+
+# Supported date formats in the usual form with two digit fields, which are parsed without strptime
+ISO_DATE_PATTERN = re.compile(r"(\d{4})-(\d\d)-(\d\d)[Tt](\d\d):(\d\d)(?::(\d\d)(?:\.(\d{1,6}))?)?(?:(Z)|z|([+-])(\d\d):?(\d\d))?", re.ASCII)
+# Every supported format starts with the date followed by a T
+ISO_DATE_PREFIX = re.compile(r"\d{4}-\d{1,2}-(?:\d{1,2}| \d)[Tt]")
+
+# List of xpaths for HTML tags that could contain a date
+# Tuple scores reflect confidence in these xpaths and the preference used for extraction
+DATE_XPATHS = CompiledXPaths([
+    ('//meta[@property="article:published_time"]/@content', 13),
+    ('//meta[@property="og:updated_time"]/@content', 10),
+    ('//meta[@property="og:article:published_time"]/@content', 10),
+    ('//meta[@property="og:article:modified_time"]/@content', 10),
+    ('//meta[@property="article:published"]/@content', 7),
+    ('//meta[@itemprop="datePublished"]/@content', 3),
+    ('//time/@datetime', 3),
+    ('//meta[@itemprop="dateModified"]/@content', 2),
+    ('//meta[@property="article:modified_time"]/@content', 2),
+])
 
 
 def extract_date(html):
-    """Return the article date from the article HTML"""
-
-    # List of xpaths for HTML tags that could contain a date
-    # Tuple scores reflect confidence in these xpaths and the preference used for extraction
-    xpaths = [
-        ('//meta[@property="article:published_time"]/@content', 13),
-        ('//meta[@property="og:updated_time"]/@content', 10),
-        ('//meta[@property="og:article:published_time"]/@content', 10),
-        ('//meta[@property="og:article:modified_time"]/@content', 10),
-        ('//meta[@property="article:published"]/@content', 7),
-        ('//meta[@itemprop="datePublished"]/@content', 3),
-        ('//time/@datetime', 3),
-        ('//meta[@itemprop="dateModified"]/@content', 2),
-        ('//meta[@property="article:modified_time"]/@content', 2),
-    ]
+    """Return the article date from the article HTML (a string or a tree from parse_html)"""
 
     # Get all the dates
-    extracted_dates = extract_element(html, xpaths)
+    extracted_dates = extract_element(html, DATE_XPATHS)
     if not extracted_dates:
         return None
 
@@ -34,6 +41,57 @@ def extract_date(html):
 
 def ensure_iso_date_format(date_string, ignoretz=True):
     """Check date_string is in one of our supported formats and return it"""
+    match = ISO_DATE_PATTERN.fullmatch(date_string)
+    if match:
+        isodate = datetime_from_iso_match(match)
+    elif ISO_DATE_PREFIX.match(date_string):
+        # Less usual variations, such as single digit fields, are left to strptime
+        isodate = strptime_iso_date(date_string)
+    else:
+        return None
+    if isodate is None:
+        return None
+    if ignoretz:
+        isodate = isodate.replace(tzinfo=None, microsecond=0)
+    return isodate.isoformat()
+
+
+def ensure_iso_date_formats(date_strings, ignoretz=True):
+    """Return the result of ensure_iso_date_format for each of date_strings, parsing repeated strings only once"""
+    iso_dates = {}
+    for date_string in date_strings:
+        if date_string not in iso_dates:
+            iso_dates[date_string] = ensure_iso_date_format(date_string, ignoretz)
+    return [iso_dates[date_string] for date_string in date_strings]
+
+
+def datetime_from_iso_match(match):
+    """Return the datetime for a match of ISO_DATE_PATTERN, or None if it is not in a supported format (the same result as strptime_iso_date)"""
+    year, month, day, hour, minute, second, fraction, utc, sign, tz_hours, tz_minutes = match.groups()
+    # Without seconds there must be a timezone, and fractional seconds can only be followed by Z
+    if second is None and utc is None and sign is None:
+        return None
+    if fraction is not None and sign is not None:
+        return None
+    if tz_minutes is not None and int(tz_minutes) > 59:
+        return None
+    try:
+        if sign is not None:
+            offset = timedelta(hours=int(tz_hours), minutes=int(tz_minutes))
+            tzinfo = timezone(-offset if sign == "-" else offset)
+        elif utc is not None and fraction is None:
+            # strptime reads Z as UTC for %z, but as a literal for "%S.%fZ" and lowercase z
+            tzinfo = timezone.utc
+        else:
+            tzinfo = None
+        microsecond = int(fraction.ljust(6, "0")) if fraction else 0
+        return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0), microsecond, tzinfo)
+    except ValueError:
+        return None
+
+
+def strptime_iso_date(date_string):
+    """Return the datetime for date_string if it is in one of our supported formats, or None"""
     supported_date_formats = [
         "%Y-%m-%dT%H:%M:%S",      # '2014-10-24T17:32:46'
         "%Y-%m-%dT%H:%M:%S%z",    # '2014-10-24T17:32:46+12:00'
@@ -49,12 +107,8 @@ def ensure_iso_date_format(date_string, ignoretz=True):
             # colons (eg. 2014-10-24T17:32:46+12:00). By stripping the colon here,
             # we ensure that all versions of python can parse datetimes like these
             if date_format in ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M%z") and date_string[-3] == ':':
-                isodate = datetime.strptime(date_string[:-3] + date_string[-2:], date_format)
-            else:
-                isodate = datetime.strptime(date_string, date_format)
-            if ignoretz:
-                isodate = isodate.replace(tzinfo=None, microsecond=0)
-            return isodate.isoformat()
+                return datetime.strptime(date_string[:-3] + date_string[-2:], date_format)
+            return datetime.strptime(date_string, date_format)
         except ValueError:
             pass
     return None
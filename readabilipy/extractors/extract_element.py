@@ -1,35 +1,113 @@
 from collections import defaultdict
+import re
 import lxml.html
 from ..simplifiers import normalise_whitespace
 
 
+# Number of characters (or bytes) fed to the parser at a time when looking for the end of the <head>
+HEAD_CHUNK_SIZE = 4096
+
+# Matches xpaths which select the content of <meta> elements with a given attribute value
+META_CONTENT_XPATH = re.compile(r'^//meta\[@([\w:.-]+)="([^"]*)"\]/@content$')
+ALL_META_CONTENT = lxml.etree.XPath('//meta[@content]')
+
+
+class CompiledXPaths:
+    """A list of (xpath, score) tuples compiled once so that it can be evaluated against many trees.
+        All of the xpaths selecting the content of <meta> elements by an attribute value are answered
+        by a single scan of the <meta> elements, and the others are compiled into lxml XPath objects.
+    """
+
+    def __init__(self, xpaths):
+        self.xpaths = list(xpaths)
+        # Maps (attribute, value) to the indexes of the xpaths selecting <meta> elements with that attribute value
+        self.meta_xpaths = defaultdict(list)
+        self.compiled_xpaths = {}
+        for index, (xpath, _) in enumerate(self.xpaths):
+            match = META_CONTENT_XPATH.match(xpath)
+            if match:
+                self.meta_xpaths[match.groups()].append(index)
+            else:
+                self.compiled_xpaths[index] = lxml.etree.XPath(xpath)
+
+    def evaluate(self, lxml_html):
+        """Yield each xpath and its score together with the list of strings it selects from the tree, in the original order."""
+        found_meta_content = defaultdict(list)
+        if self.meta_xpaths:
+            for meta in ALL_META_CONTENT(lxml_html):
+                for attribute in meta.attrib.items():
+                    for index in self.meta_xpaths.get(attribute, ()):
+                        found_meta_content[index].append(meta.get("content"))
+        for index, (xpath, score) in enumerate(self.xpaths):
+            if index in self.compiled_xpaths:
+                found_elements = self.compiled_xpaths[index](lxml_html)
+                found_elements = found_elements if isinstance(found_elements, list) else [found_elements]
+            else:
+                found_elements = found_meta_content[index]
+            yield xpath, score, found_elements
+
+
+def parse_html(html):
+    """Parse article HTML into an lxml tree which can be shared between extractors.
+        Returns None if the html is not parseable.
+    """
+    try:
+        return lxml.html.fromstring(html)
+    except lxml.etree.ParserError:
+        return None
+
+
+def parse_html_head(html):
+    """Parse only the <head> of article HTML into an lxml tree, stopping as soon as the parser closes it.
+        Anything parsed after the head is dropped, so the tree only contains the <html> and <head> elements.
+        Returns None if the head never ends before the end of the document, or the html is not parseable.
+    """
+    parser = lxml.etree.HTMLPullParser(events=("end",))
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+    for start in range(0, len(html), HEAD_CHUNK_SIZE):
+        parser.feed(html[start:start + HEAD_CHUNK_SIZE])
+        if any(element.tag == "head" for _, element in parser.read_events()):
+            try:
+                lxml_html = parser.close()
+            except lxml.etree.XMLSyntaxError:
+                return None
+            # The last chunk may also have started the body, which must not depend on where the chunk ended
+            for element in list(lxml_html):
+                if element.tag != "head":
+                    lxml_html.remove(element)
+            return lxml_html
+    return None
+
+
 def extract_element(html, xpaths, process_dict_fn=None):
     """Return the relevant elements (titles, dates or bylines) from article HTML, specified by xpaths.
-        xpaths should be a list of tuples, each with the xpath and a reliability scores.
+        html can be either a string or a tree returned by parse_html, so that several extractors can share one parse.
+        xpaths should be a list of tuples, each with the xpath and a reliability scores, or the same list compiled with CompiledXPaths.
         Processing of the dictionary can be handled with the arg function.
         The returned dictionary should have the processed elements as keys and dicts with scores and the xpaths used as values
     """
     # Attempt to parse the html, aborting here if it is not parseable
-    try:
-        lxml_html = lxml.html.fromstring(html)
-    except lxml.etree.ParserError:
+    lxml_html = parse_html(html) if isinstance(html, (str, bytes)) else html
+    if lxml_html is None:
         return None
 
+    if not isinstance(xpaths, CompiledXPaths):
+        xpaths = CompiledXPaths(xpaths)
+
     # Get all elements specified and combine scores
     extracted_strings = defaultdict(dict)
-    for extraction_xpath, score in xpaths:
-        found_elements = lxml_html.xpath(extraction_xpath)
-        found_elements = found_elements if isinstance(found_elements, list) else [found_elements]
+    for extraction_xpath, score, found_elements in xpaths.evaluate(lxml_html):
         for found_element in found_elements:
             element = normalise_whitespace(found_element)
             if element:
                 try:
                     extracted_strings[element]['score'] += score
                     extracted_strings[element]['xpaths'].append(extraction_xpath)
-                    extracted_strings[element]['xpaths'].sort()
                 except KeyError:
                     extracted_strings[element]['score'] = score
                     extracted_strings[element]['xpaths'] = [extraction_xpath]
+    for score_xpath_dict in extracted_strings.values():
+        score_xpath_dict['xpaths'].sort()
 
     # Edit the dictionary
     if process_dict_fn:
@@ -0,0 +1,25 @@
+from .extract_date import extract_date
+from .extract_element import parse_html, parse_html_head
+from .extract_title import extract_title
+
+
+def extract_head_metadata(html):
+    """Return the article title and date as a dictionary, looking only in the <head> of the article HTML where possible.
+        Only the start of the document up to the end of the <head> is parsed, so this is much cheaper than
+        extract_title and extract_date on large pages. The whole document is parsed instead when the head
+        does not end or is missing the title or date, so pages without a date in the head are parsed twice and
+        cost more than extract_title and extract_date together. Unlike those, the body is not considered at
+        all when the head has a title or date. A body heading never replaces a title from the head, and a
+        <time datetime> in the body never replaces a lower scoring date from the head, such as
+        article:modified_time.
+    """
+    lxml_head = parse_html_head(html)
+    title = extract_title(lxml_head) if lxml_head is not None else None
+    date = extract_date(lxml_head) if lxml_head is not None else None
+    if title is None or date is None:
+        lxml_html = parse_html(html)
+        if title is None:
+            title = extract_title(lxml_html)
+        if date is None:
+            date = extract_date(lxml_html)
+    return {"title": title, "date": date}
@@ -1,32 +1,35 @@
-from itertools import permutations
-from .extract_element import extract_element
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
+from .extract_element import CompiledXPaths, extract_element
+
+
+# List of xpaths for HTML tags that could contain a title
+# Tuple scores reflect confidence in these xpaths and the preference used for extraction
+TITLE_XPATHS = CompiledXPaths([
+    ('//header[@class="entry-header"]/h1[@class="entry-title"]//text()', 4),
+    ('//meta[@property="og:title"]/@content', 4),
+    ('//h1[@class="entry-title"]//text()', 3),
+    ('//h1[@itemprop="headline"]//text()', 3),
+    ('//h2[@itemprop="headline"]//text()', 2),
+    ('//meta[contains(@itemprop, "headline")]/@content', 2),
+    ('//body/title//text()', 1),
+    ('//div[@class="postarea"]/h2/a//text()', 1),
+    ('//h1[@class="post__title"]//text()', 1),
+    ('//h1[@class="title"]//text()', 1),
+    ('//head/title//text()', 1),
+    ('//header/h1//text()', 1),
+    ('//meta[@name="dcterms.title"]/@content', 1),
+    ('//meta[@name="fb_title"]/@content', 1),
+    ('//meta[@name="sailthru.title"]/@content', 1),
+    ('//meta[@name="title"]/@content', 1),
+])
 
 
 def extract_title(html):
-    """Return the article title from the article HTML"""
-
-    # List of xpaths for HTML tags that could contain a title
-    # Tuple scores reflect confidence in these xpaths and the preference used for extraction
-    xpaths = [
-        ('//header[@class="entry-header"]/h1[@class="entry-title"]//text()', 4),
-        ('//meta[@property="og:title"]/@content', 4),
-        ('//h1[@class="entry-title"]//text()', 3),
-        ('//h1[@itemprop="headline"]//text()', 3),
-        ('//h2[@itemprop="headline"]//text()', 2),
-        ('//meta[contains(@itemprop, "headline")]/@content', 2),
-        ('//body/title//text()', 1),
-        ('//div[@class="postarea"]/h2/a//text()', 1),
-        ('//h1[@class="post__title"]//text()', 1),
-        ('//h1[@class="title"]//text()', 1),
-        ('//head/title//text()', 1),
-        ('//header/h1//text()', 1),
-        ('//meta[@name="dcterms.title"]/@content', 1),
-        ('//meta[@name="fb_title"]/@content', 1),
-        ('//meta[@name="sailthru.title"]/@content', 1),
-        ('//meta[@name="title"]/@content', 1),
-    ]
-
-    extracted_titles = extract_element(html, xpaths, process_dict_fn=combine_similar_titles)
+    """Return the article title from the article HTML (a string or a tree from parse_html)"""
+
+    extracted_titles = extract_element(html, TITLE_XPATHS, process_dict_fn=combine_similar_titles)
     if not extracted_titles:
         return None
     return max(extracted_titles, key=lambda x: extracted_titles[x].get('score'))
@@ -35,17 +38,47 @@ def extract_title(html):
 def combine_similar_titles(extracted_strings):
     """Take a dictionary with titles and nested dicts with scores and combine scores for titles which we decide are the same."""
 
-    # Iterate through each possible pair of title keys, including both permutations of each pair
-    for title_pair in permutations(extracted_strings, 2):
-        # If the first title is a subset of the second then combine their scores, taking the shorter one as the key
-        if title_pair[0] in title_pair[1]:
-            extracted_strings[title_pair[0]]['score'] += extracted_strings[title_pair[1]]['score']
-            extracted_strings[title_pair[0]]['xpaths'] += extracted_strings[title_pair[1]]['xpaths']
-        # If the first title is identical to the second (ignoring case) then combine their scores, taking the one with more capitals as the key
-        elif title_pair[0].lower() == title_pair[1].lower():
-            if len([c for c in title_pair[0] if c.isupper()]) > len([c for c in title_pair[1] if c.isupper()]):
-                extracted_strings[title_pair[0]]['score'] += extracted_strings[title_pair[1]]['score']
-                extracted_strings[title_pair[0]]['xpaths'] += extracted_strings[title_pair[1]]['xpaths']
+    # Work out up front which titles each title absorbs: those it is a subset of (taking the shorter one as the key),
+    # and those identical to it ignoring case with fewer capitals (taking the one with more capitals as the key)
+    titles = list(extracted_strings)
+    similar_titles = [containing | same_case for containing, same_case in zip(containing_titles(titles), same_titles_ignoring_case(titles))]
+
+    # Combine scores in the same order as comparing each possible pair of title keys, including both permutations of each pair
+    for title, similar in zip(titles, similar_titles):
+        for index in sorted(similar):
+            extracted_strings[title]['score'] += extracted_strings[titles[index]]['score']
+            extracted_strings[title]['xpaths'] += extracted_strings[titles[index]]['xpaths']
     for score_xpath_dict in extracted_strings.values():
         score_xpath_dict['xpaths'].sort()
     return extracted_strings
+
+
+def containing_titles(titles):
+    """Return a set for each title with the indexes of the other titles which contain it."""
+    # Search for each title in all of the others at once by joining them with a separator which none of them contain
+    separator = "\n"
+    if any(separator in title for title in titles):
+        return [{j for j, other in enumerate(titles) if j != i and title in other} for i, title in enumerate(titles)]
+    joined = separator.join(titles)
+    starts = list(accumulate([0] + [len(title) + len(separator) for title in titles]))
+    containing = []
+    for i, title in enumerate(titles):
+        found = set()
+        position = joined.find(title)
+        while position != -1:
+            j = bisect_right(starts, position) - 1
+            if j != i:
+                found.add(j)
+            # Move on to the next title as we only need to know whether each one contains the title
+            position = joined.find(title, starts[j + 1]) if j + 1 < len(titles) else -1
+        containing.append(found)
+    return containing
+
+
+def same_titles_ignoring_case(titles):
+    """Return a set for each title with the indexes of the titles which are identical to it ignoring case but have fewer capitals."""
+    capitals = [sum(1 for c in title if c.isupper()) for title in titles]
+    indexes_by_lowercase = defaultdict(list)
+    for i, title in enumerate(titles):
+        indexes_by_lowercase[title.lower()].append(i)
+    return [{j for j in indexes_by_lowercase[title.lower()] if capitals[i] > capitals[j]} for i, title in enumerate(titles)]
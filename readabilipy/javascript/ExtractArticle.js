@@ -3,6 +3,9 @@
  */
 
 const fs = require('fs');
+const os = require('os');
+const readline = require('readline');
+const { Worker, isMainThread, parentPort } = require('worker_threads');
 const { Readability } = require('@mozilla/readability');
 const { JSDOM } = require('jsdom');
 
@@ -10,32 +13,205 @@ function readFile(filePath) {
 	return fs.readFileSync(filePath, {encoding: "utf-8"}).trim();
 }
 
+function readStdin() {
+	return fs.readFileSync(0, {encoding: "utf-8"}).trim();
+}
+
 function writeFile(data, filePath) {
 	return fs.writeFileSync(filePath, data, {encoding: "utf-8"});
 }
+
+function extractArticle(html) {
+	var doc = new JSDOM(html);
+	let reader = new Readability(doc.window.document);
+	let article = reader.parse();
+	// Free the DOM straight away so that long-running workers do not accumulate windows
+	doc.window.close();
+	return article;
+}
+
+function errorMessage(e) {
+	return String((e && e.stack) || e);
+}
+
+function serve() {
+	// Worker mode: read one JSON request ({"html": ...}) per line from stdin
+	// and write one JSON response ({"article": ...} or {"error": ...}) per line to stdout.
+	// Each response also reports the resident set size so that the caller can
+	// recycle workers which have grown too large.
+	const lines = readline.createInterface({input: process.stdin, crlfDelay: Infinity});
+	lines.on('line', function(line) {
+		var response;
+		try {
+			let request = JSON.parse(line);
+			response = {article: extractArticle(request.html.trim())};
+		} catch (e) {
+			response = {error: errorMessage(e)};
+		}
+		response.rss = process.memoryUsage().rss;
+		process.stdout.write(JSON.stringify(response) + "\n");
+	});
+}
+
+function batchThread() {
+	// Runs inside a batch worker thread: extract one document per message,
+	// reading it from disk here so that file I/O is also spread over the threads
+	parentPort.on('message', function(task) {
+		var result = {id: task.id};
+		try {
+			let html = (task.path === undefined) ? task.html.trim() : readFile(task.path);
+			result.article = extractArticle(html);
+		} catch (e) {
+			result.error = errorMessage(e);
+		}
+		parentPort.postMessage(result);
+	});
+}
+
+async function batch(manifest, nThreads, outFilePath) {
+	// Batch mode: the manifest is either a file listing one input path per
+	// line or "-" to read NDJSON records ({"id": ..., "html": ...}) from stdin.
+	// Documents are extracted on a pool of worker threads and one NDJSON result
+	// ({"id": ..., "article": ...} or {"id": ..., "error": ...}) is written per
+	// document in order of completion.
+	const fromStdin = (manifest === '-');
+	const input = fromStdin ? process.stdin : fs.createReadStream(manifest, {encoding: "utf-8"});
+	const lines = readline.createInterface({input: input, crlfDelay: Infinity});
+	const out = (outFilePath === undefined) ? process.stdout : fs.createWriteStream(outFilePath, {encoding: "utf-8"});
+	const idle = [];
+	const waiting = [];
+	const threads = new Set();
+
+	function writeResult(result) {
+		out.write(JSON.stringify(result) + "\n");
+	}
+
+	function release(thread) {
+		thread.task = undefined;
+		if (waiting.length) {
+			waiting.shift()(thread);
+		} else {
+			idle.push(thread);
+		}
+	}
+
+	function acquire() {
+		if (idle.length) {
+			return Promise.resolve(idle.pop());
+		}
+		return new Promise(function(resolve) { waiting.push(resolve); });
+	}
+
+	function spawn() {
+		let thread = new Worker(__filename);
+		threads.add(thread);
+		thread.on('message', function(result) {
+			writeResult(result);
+			release(thread);
+		});
+		thread.on('error', function(e) {
+			// The thread has died (e.g. out of memory) so report its document
+			// as failed and replace it with a fresh one
+			threads.delete(thread);
+			if (thread.task !== undefined) {
+				writeResult({id: thread.task.id, error: errorMessage(e)});
+			}
+			release(spawn());
+		});
+		return thread;
+	}
+
+	for (let i = 0; i < nThreads; i++) {
+		idle.push(spawn());
+	}
+
+	try {
+		var lineNumber = 0;
+		for await (const line of lines) {
+			lineNumber++;
+			if (!line.trim()) {
+				continue;
+			}
+			var task;
+			if (fromStdin) {
+				// Records without an id are identified by {"line": <line number>},
+				// which cannot be mistaken for the id of another record
+				task = {id: {line: lineNumber}};
+				try {
+					let record = JSON.parse(line);
+					if (record === null || typeof(record) !== 'object' || Array.isArray(record)) {
+						throw new TypeError("record is not a JSON object");
+					}
+					if (record.id !== undefined) {
+						task.id = record.id;
+					}
+					if (typeof(record.html) !== 'string') {
+						throw new TypeError('"html" is missing or not a string');
+					}
+					task.html = record.html;
+				} catch (e) {
+					writeResult({id: task.id, error: "Invalid NDJSON record: " + String(e)});
+					continue;
+				}
+			} else {
+				task = {id: line, path: line};
+			}
+			let thread = await acquire();
+			thread.task = task;
+			thread.postMessage(task);
+		}
+
+		// Wait for every thread to finish its last document
+		for (let i = 0; i < nThreads; i++) {
+			await acquire();
+		}
+	} finally {
+		// Shut the threads down even if reading the manifest failed, or the process would never exit
+		await Promise.all(Array.from(threads, function(thread) { return thread.terminate(); }));
+		if (outFilePath !== undefined) {
+			out.end();
+		}
+	}
+}
+
 function main() {
 	var outFilePath;
 
-	var argv = require('minimist')(process.argv.slice(2));
-	if (argv['i'] === undefined) {
-		console.log("Input file required.");
-		return 1;
+	var argv = require('minimist')(process.argv.slice(2), {boolean: ['worker'], string: ['batch']});
+	if (argv['worker']) {
+		serve();
+		return 0;
 	}
-
+	if (argv['batch'] !== undefined) {
+		let nThreads = parseInt(argv['threads'], 10) || os.cpus().length;
+		batch(argv['batch'], nThreads, argv['o']).catch(function(e) {
+			console.error(errorMessage(e));
+			process.exitCode = 1;
+		});
+		return 0;
+	}
+	// Without an input file we read HTML from stdin and, unless an output
+	// file is given, write the article JSON to stdout
 	var inFilePath = argv['i'];
 	if (typeof(argv['o']) !== 'undefined') {
 		outFilePath = argv['o'];
-	} else {
+	} else if (inFilePath !== undefined) {
 		outFilePath = inFilePath + ".simple.json";
 	}
 
-	var html = readFile(inFilePath);
-	var doc = new JSDOM(html);
-	let reader = new Readability(doc.window.document);
-	let article = reader.parse();
+	var html = (inFilePath === undefined) ? readStdin() : readFile(inFilePath);
+	let article = extractArticle(html);
 
-	writeFile(JSON.stringify(article), outFilePath);
+	if (outFilePath === undefined) {
+		process.stdout.write(JSON.stringify(article));
+	} else {
+		writeFile(JSON.stringify(article), outFilePath);
+	}
 	return 0;
 }
 
-main();
+if (isMainThread) {
+	main();
+} else {
+	batchThread();
+}
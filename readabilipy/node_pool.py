@@ -0,0 +1,343 @@
+"""Persistent Node.js workers for running Readability.js."""
+import asyncio
+import json
+import os
+import queue
+import subprocess
+import threading
+
+from .utils import have_node
+
+
+JAVASCRIPT_DIR = os.path.join(os.path.dirname(__file__), "javascript")
+# Responses are single JSON lines which can be much longer than asyncio's default 64 KiB line limit
+STREAM_LIMIT = 2 ** 30
+
+
+class NodeWorkerError(RuntimeError):
+    """Raised when a Node.js worker fails to return an article."""
+
+
+class NodeWorkerTimeoutError(NodeWorkerError, TimeoutError):
+    """Raised when Readability.js does not return an article before the deadline."""
+
+
+def worker_command(max_rss=None):
+    """Command for starting a worker, capping the V8 heap when there is a memory limit (in MB)."""
+    command = ["node"]
+    if max_rss is not None:
+        command.append(f"--max-old-space-size={max_rss}")
+    return command + ["ExtractArticle.js", "--worker"]
+
+
+def encode_request(html):
+    return json.dumps({"html": html}, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def decode_response(line):
+    if not line:
+        raise NodeWorkerError("Node.js worker exited unexpectedly (it may have run out of memory)")
+    return json.loads(line)
+
+
+def article_from_response(response):
+    if "error" in response:
+        raise NodeWorkerError(response["error"])
+    return response["article"]
+
+
+class NodeWorker:
+    """A long-lived `node ExtractArticle.js --worker` process.
+
+    Requests and responses are exchanged as newline-delimited JSON over the
+    stdin and stdout pipes of the process, so each document costs a single
+    round trip rather than a Node.js startup.
+    """
+
+    def __init__(self, max_rss=None):
+        self.process = subprocess.Popen(  # pylint: disable=consider-using-with
+            worker_command(max_rss),
+            cwd=JAVASCRIPT_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.documents = 0
+        self.rss = 0
+        self.killed = False
+
+    def is_alive(self):
+        return not self.killed and self.process.poll() is None
+
+    def extract(self, html, timeout=None):
+        """Return the Readability.js article for the HTML, or None if there is no article.
+
+        If no response arrives within timeout seconds the worker is killed and
+        NodeWorkerTimeoutError is raised.
+        """
+        # Killing the process from a timer unblocks the readline() below on any platform
+        watchdog = threading.Timer(timeout, self.kill) if timeout is not None else None
+        try:
+            self.process.stdin.write(encode_request(html))
+            self.process.stdin.flush()
+            if watchdog:
+                watchdog.start()
+            line = self.process.stdout.readline()
+            if self.killed:
+                raise NodeWorkerTimeoutError(f"Readability.js took longer than {timeout}s")
+            response = decode_response(line)
+        except NodeWorkerError:
+            # The process state is unknown so don't try to reuse it
+            self.close()
+            raise
+        except (OSError, ValueError) as e:
+            self.close()
+            raise NodeWorkerError(f"Lost contact with Node.js worker: {e}") from e
+        finally:
+            if watchdog:
+                watchdog.cancel()
+        self.documents += 1
+        self.rss = response.get("rss", 0)
+        return article_from_response(response)
+
+    def kill(self):
+        self.killed = True
+        if self.process.poll() is None:
+            self.process.kill()
+
+    def close(self):
+        """Ask the worker to exit, killing it if it does not do so promptly."""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+class AsyncNodeWorker:
+    """An asyncio equivalent of NodeWorker, talking to Node.js over asyncio subprocess pipes."""
+
+    def __init__(self, process):
+        self.process = process
+        self.documents = 0
+        self.rss = 0
+        self.killed = False
+
+    @classmethod
+    async def start(cls, max_rss=None):
+        process = await asyncio.create_subprocess_exec(
+            *worker_command(max_rss),
+            cwd=JAVASCRIPT_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            limit=STREAM_LIMIT,
+        )
+        return cls(process)
+
+    def is_alive(self):
+        return not self.killed and self.process.returncode is None
+
+    async def extract(self, html, timeout=None):
+        """Return the Readability.js article for the HTML, or None if there is no article.
+
+        If no response arrives within timeout seconds the worker is killed and
+        NodeWorkerTimeoutError is raised.
+        """
+        try:
+            self.process.stdin.write(encode_request(html))
+            await self.process.stdin.drain()
+            line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+            response = decode_response(line)
+        except asyncio.TimeoutError as e:
+            self.kill()
+            raise NodeWorkerTimeoutError(f"Readability.js took longer than {timeout}s") from e
+        except NodeWorkerError:
+            await self.close()
+            raise
+        except (OSError, ValueError) as e:
+            await self.close()
+            raise NodeWorkerError(f"Lost contact with Node.js worker: {e}") from e
+        except BaseException:
+            # Cancelled part way through a request: the next response on the
+            # pipe would belong to this request so the worker cannot be reused
+            self.kill()
+            raise
+        self.documents += 1
+        self.rss = response.get("rss", 0)
+        return article_from_response(response)
+
+    def kill(self):
+        self.killed = True
+        if self.process.returncode is None:
+            self.process.kill()
+
+    async def close(self):
+        """Ask the worker to exit, killing it if it does not do so promptly."""
+        self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+
+class BaseNodeWorkerPool:
+    """Settings shared by the threaded and asyncio worker pools.
+
+    - `size`: the maximum number of workers, and so of documents in flight.
+    - `timeout`: default per-document deadline in seconds. A worker which
+      misses it is killed and replaced, and NodeWorkerTimeoutError is raised.
+    - `max_rss`: memory limit per worker in MB. It caps the V8 heap, so a
+      worker which runs away on one document dies instead of growing without
+      bound, and a worker whose resident set is over the limit after a
+      document is replaced.
+    - `max_documents`: replace each worker after this many documents to
+      bound the heap growth of long-lived JSDOM processes.
+    """
+
+    def __init__(self, size=1, timeout=None, max_rss=None, max_documents=None):
+        if size < 1:
+            raise ValueError("Node.js worker pool size must be at least 1")
+        self.size = size
+        self.timeout = timeout
+        self.max_rss = max_rss
+        self.max_documents = max_documents
+        self._closed = False
+        self._available = None
+
+    def _reusable(self, worker):
+        if self._closed or not worker.is_alive():
+            return False
+        if self.max_documents is not None and worker.documents >= self.max_documents:
+            return False
+        if self.max_rss is not None and worker.rss > self.max_rss * 1024 * 1024:
+            return False
+        return True
+
+
+class NodeWorkerPool(BaseNodeWorkerPool):
+    """A pool of persistent Node.js workers which can be reused across calls.
+
+    Up to `size` workers are started on demand. Each worker handles one
+    document at a time, so the pool can be shared between threads and will
+    run up to `size` extractions in parallel. Pass the pool to
+    `simple_json_from_html_string` via its `node_pool` argument and call
+    `close()` (or use the pool as a context manager) when finished.
+    See BaseNodeWorkerPool for the deadline and memory limit settings.
+    """
+
+    def __init__(self, size=1, timeout=None, max_rss=None, max_documents=None):
+        super().__init__(size, timeout, max_rss, max_documents)
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def available(self):
+        """Check (once per pool) whether we can run Readability.js."""
+        if self._available is None:
+            self._available = have_node()
+        return self._available
+
+    def extract(self, html, timeout=None):
+        """Return the Readability.js article for the HTML using the next free worker.
+
+        timeout overrides the pool's default deadline for this document.
+        """
+        worker = self._acquire()
+        try:
+            return worker.extract(html, timeout if timeout is not None else self.timeout)
+        finally:
+            self._release(worker)
+
+    def close(self):
+        """Shut down all idle workers. Busy workers are shut down when they are released."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _acquire(self):
+        if self._closed:
+            raise NodeWorkerError("Node.js worker pool has been closed")
+        self._slots.acquire()  # pylint: disable=consider-using-with
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return NodeWorker(self.max_rss)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, worker):
+        if self._reusable(worker):
+            self._idle.put(worker)
+        else:
+            worker.close()
+        self._slots.release()
+
+
+class AsyncNodeWorkerPool(BaseNodeWorkerPool):
+    """A pool of persistent Node.js workers for use from asyncio code.
+
+    Behaves like NodeWorkerPool, but waiting for a free worker and for the
+    response from Node.js both happen without blocking the event loop. Pass
+    it to `simple_json_from_html_string_async` via its `node_pool` argument.
+    """
+
+    def __init__(self, size=1, timeout=None, max_rss=None, max_documents=None):
+        super().__init__(size, timeout, max_rss, max_documents)
+        self._slots = None
+        self._idle = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def available(self):
+        """Check (once per pool) whether we can run Readability.js."""
+        if self._available is None:
+            self._available = await asyncio.get_event_loop().run_in_executor(None, have_node)
+        return self._available
+
+    async def extract(self, html, timeout=None):
+        """Return the Readability.js article for the HTML using the next free worker.
+
+        timeout overrides the pool's default deadline for this document.
+        """
+        if self._closed:
+            raise NodeWorkerError("Node.js worker pool has been closed")
+        if self._slots is None:
+            # Created here rather than in __init__ so that it belongs to the running event loop
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            worker = self._idle.pop() if self._idle else await AsyncNodeWorker.start(self.max_rss)
+            try:
+                return await worker.extract(html, timeout if timeout is not None else self.timeout)
+            finally:
+                if self._reusable(worker):
+                    self._idle.append(worker)
+                else:
+                    await worker.close()
+
+    async def close(self):
+        """Shut down all idle workers. Busy workers are shut down when they are released."""
+        self._closed = True
+        while self._idle:
+            await self._idle.pop().close()
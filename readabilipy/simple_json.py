@@ -1,119 +1,376 @@
+import asyncio
+import functools
 import hashlib
 import json
 import os
-import tempfile
 import subprocess
 import sys
+import time
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
 
 from bs4 import BeautifulSoup
-from bs4.element import Comment, NavigableString, CData
+from bs4.element import Comment, NavigableString, CData, PreformattedString
 from .simple_tree import simple_tree_from_html_string
-from .extractors import extract_date, extract_title
-from .simplifiers import normalise_text
-from .utils import run_npm_install
+from .extractors import extract_date, extract_title, parse_html
+from .simplifiers import normalise_text, normalise_texts
+from .node_pool import JAVASCRIPT_DIR, NodeWorkerPool, NodeWorkerTimeoutError
+from .utils import have_node
 
 
-def have_node():
-    """Check that we can run node and have a new enough version """
-    try:
-        cp = subprocess.run(['node', '-v'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
-    except FileNotFoundError:
-        return False
-
-    if not cp.returncode == 0:
-        return False
-
-    major = int(cp.stdout.split(b'.')[0].lstrip(b'v'))
-    if major < 10:
-        return False
-
-    # check that this package has a node_modules dir in the javascript
-    # directory, if it doesn't, it wasn't installed with Node support
-    jsdir = os.path.join(os.path.dirname(__file__), 'javascript')
-    node_modules = os.path.join(jsdir, 'node_modules')
-    if not os.path.exists(node_modules):
-        # Try installing node dependencies.
-        run_npm_install()
-    return os.path.exists(node_modules)
-
-
-def simple_json_from_html_string(html, content_digests=False, node_indexes=False, use_readability=False):
-    if use_readability and not have_node():
-        print("Warning: node executable not found, reverting to pure-Python mode. Install Node.js v10 or newer to use Readability.js.", file=sys.stderr)
+# Used to look up how html.parser builds trees
+HTML_PARSER = BeautifulSoup("", "html.parser")
+
+
+def simple_json_from_html_string(html, content_digests=False, node_indexes=False, use_readability=False, node_pool=None, timeout=None, parser="html5lib", fields=None, lazy=False):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Extract an article as a dictionary, or as an ArticleResult computed on access if lazy is set."""
+    fields = checked_fields(fields)
+    if use_readability and not (node_pool.available() if node_pool is not None else have_node()):
+        warn_node_not_found()
         use_readability = False
 
+    if use_readability and node_pool is not None:
+        # Send the HTML to an already running Node.js worker from the pool
+        input_json = node_pool.extract(html, timeout)
+    elif use_readability:
+        input_json = readability_js_json(html, timeout)
+    elif lazy:
+        return ArticleResult(python_json(html, parser, fields), content_digests, node_indexes, False, fields)
+    else:
+        return python_article_json(html, content_digests, node_indexes, parser, fields)
+
+    if lazy:
+        return ArticleResult(input_json, content_digests, node_indexes, use_readability, fields)
+    return article_json_from_input(input_json, content_digests, node_indexes, use_readability, fields)
+
+
+async def simple_json_from_html_string_async(html, content_digests=False, node_indexes=False, use_readability=False, node_pool=None, timeout=None, parser="html5lib", fields=None, executor=None):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Extract an article without blocking the event loop.
+
+    Readability.js is driven through asyncio subprocess pipes, either one
+    process per call or through an AsyncNodeWorkerPool passed as node_pool.
+    The CPU-heavy parsing and simplification stages run in executor (the
+    event loop's default executor when None).
+    """
+    fields = checked_fields(fields)
+    loop = asyncio.get_event_loop()
     if use_readability:
-        # Write input HTML to temporary file so it is available to the node.js script
-        # It is important that this file be unique in case this function is called concurrently
-        with tempfile.NamedTemporaryFile(delete=False, mode="w+", encoding="utf-8", prefix="readabilipy") as f_html:
-            f_html.write(html)
-            f_html.close()
-        tmp_html_path = f_html.name
-
-        # We assume appending ".json" to the html name will also be a unique filename
-        tmp_json_path = tmp_html_path + ".json"
-
-        # Call Mozilla's Readability.js Readability.parse() function via node, writing output to a temporary file
-        jsdir = os.path.join(os.path.dirname(__file__), 'javascript')
+        if node_pool is not None:
+            node_available = await node_pool.available()
+        else:
+            node_available = await loop.run_in_executor(executor, have_node)
+        if not node_available:
+            warn_node_not_found()
+            use_readability = False
+
+    if use_readability and node_pool is not None:
+        input_json = await node_pool.extract(html, timeout)
+    elif use_readability:
+        input_json = await readability_js_json_async(html, timeout)
+    else:
+        # Run the whole pure-Python pipeline in one call so that the simplified tree never leaves the executor
+        return await loop.run_in_executor(executor, python_article_json, html, content_digests, node_indexes, parser, fields)
+
+    return await loop.run_in_executor(executor, article_json_from_input, input_json, content_digests, node_indexes, use_readability, fields)
+
+
+def simple_json_from_html_strings(htmls, workers=None, chunksize=1, ordered=True, return_exceptions=False, **kwargs):
+    """Extract articles from many HTML strings in parallel, yielding an article dictionary for each.
+
+    The pure-Python extraction runs on a pool of `workers` processes (one per
+    CPU by default), which are sent `chunksize` documents at a time. With
+    use_readability=True the documents are instead shared between `workers`
+    threads using a NodeWorkerPool of the same size, unless one is passed as
+    node_pool. Only a few chunks per worker are read from htmls at a time.
+
+    Articles are yielded in input order, or as (index, article) pairs as soon
+    as they are ready if ordered is False. If return_exceptions is True, a
+    document which fails gives its exception in place of the article instead
+    of stopping the batch. Other keyword arguments are passed on to
+    `simple_json_from_html_string`.
+    """
+    for index, article, _ in batch_results(htmls, workers, chunksize, ordered, return_exceptions, **kwargs):
+        yield article if ordered else (index, article)
+
+
+def batch_results(htmls, workers=None, chunksize=1, ordered=True, return_exceptions=False, **kwargs):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Yield (index, article or exception, seconds taken) for each document, as for simple_json_from_html_strings."""
+    workers = workers or os.cpu_count() or 1
+    if chunksize < 1:
+        raise ValueError("Batch chunksize must be at least 1")
+    # Check the arguments once here rather than failing on every document
+    checked_fields(kwargs.get("fields"))
+    if kwargs.get("content_digests"):
+        digest_hash(digest_algorithm(kwargs["content_digests"]))
+    node_pool = kwargs.get("node_pool")
+    if kwargs.get("use_readability") and not (node_pool.available() if node_pool is not None else have_node()):
+        warn_node_not_found()
+        kwargs["use_readability"] = False
+        kwargs.pop("node_pool", None)
+
+    if kwargs.get("use_readability"):
+        # Node.js does the heavy lifting in its own processes so threads are enough here,
+        # but even a single worker reuses its Node.js process between documents
+        own_pool = NodeWorkerPool(size=workers) if node_pool is None else None
+        if own_pool is not None:
+            kwargs["node_pool"] = own_pool
         try:
-            subprocess.run(
-                ["node", "ExtractArticle.js", "-i", tmp_html_path, "-o", tmp_json_path],
-                cwd=jsdir,
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True)
-        except subprocess.CalledProcessError as e:
-            print(e.stderr)
-            raise
-
-        # Read output of call to Readability.parse() from JSON file as Python dictionary
-        with open(tmp_json_path, "r", encoding="utf-8") as json_file:
-            input_json = json.load(json_file)
-
-        # Delete temporary input and output files after processing
-        os.unlink(tmp_json_path)
-        os.unlink(tmp_html_path)
+            extract = functools.partial(extract_chunk, return_exceptions=return_exceptions, **kwargs)
+            if workers == 1:
+                yield from map_chunks(None, extract, htmls, chunksize, ordered)
+            else:
+                with ThreadPoolExecutor(workers) as executor:
+                    yield from map_chunks(executor, extract, htmls, chunksize, ordered, 2 * workers)
+        finally:
+            if own_pool is not None:
+                own_pool.close()
+    elif workers == 1:
+        yield from map_chunks(None, functools.partial(extract_chunk, return_exceptions=return_exceptions, **kwargs), htmls, chunksize, ordered)
     else:
-        input_json = {
-            "title": extract_title(html),
-            "date": extract_date(html),
-            "content": str(simple_tree_from_html_string(html))
-        }
+        with ProcessPoolExecutor(workers) as executor:
+            extract = functools.partial(extract_chunk, return_exceptions=return_exceptions, **kwargs)
+            yield from map_chunks(executor, extract, htmls, chunksize, ordered, 2 * workers)
+
+
+def extract_chunk(htmls, return_exceptions=False, **kwargs):
+    """Extract a list of documents in a batch worker, returning (article or exception, seconds taken) for each."""
+    results = []
+    for html in htmls:
+        start = time.perf_counter()
+        try:
+            article = simple_json_from_html_string(html, **kwargs)
+        except Exception as e:  # pylint: disable=broad-except
+            if not return_exceptions:
+                raise
+            article = e
+        results.append((article, time.perf_counter() - start))
+    return results
+
+
+def map_chunks(executor, function, items, chunksize, ordered, max_pending=1):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Call function on lists of up to chunksize items, yielding (index, result...) for each item.
+
+    The chunks are submitted to executor (or run here if it is None) with at
+    most max_pending chunks in flight. Results are yielded in input order if
+    ordered is set, otherwise as each chunk completes.
+    """
+    items = iter(items)
+    pending = {}
+    start = 0
+    try:
+        for chunk in iter(lambda: list(islice(items, chunksize)), []):
+            if executor is None:
+                yield from chunk_results(start, function(chunk))
+            else:
+                pending[executor.submit(function, chunk)] = start
+                while len(pending) >= max_pending:
+                    yield from completed_chunks(pending, ordered)
+            start += len(chunk)
+        while pending:
+            yield from completed_chunks(pending, ordered)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def completed_chunks(pending, ordered):
+    # In order means waiting for the chunk which starts first
+    done = [min(pending, key=pending.get)] if ordered else wait(pending, return_when=FIRST_COMPLETED).done
+    for future in done:
+        yield from chunk_results(pending.pop(future), future.result())
+
+
+def chunk_results(start, results):
+    for offset, result in enumerate(results):
+        yield (start + offset,) + tuple(result)
+
 
+def article_fields():
+    """Fields of the article dictionary, all of which are returned by default."""
+    return ["title", "byline", "date", "content", "plain_content", "plain_text"]
+
+
+def checked_fields(fields):
+    if fields is None:
+        return article_fields()
+    unknown = [field for field in fields if field not in article_fields()]
+    if unknown:
+        raise ValueError(f"Unknown article fields {', '.join(unknown)}, expected some of {', '.join(article_fields())}")
+    return [field for field in article_fields() if field in fields]
+
+
+def warn_node_not_found():
+    print("Warning: node executable not found, reverting to pure-Python mode. Install Node.js v10 or newer to use Readability.js.", file=sys.stderr)
+
+
+def readability_js_json(html, timeout=None):
+    # Call Mozilla's Readability.js Readability.parse() function via node,
+    # streaming the HTML in through stdin and the article JSON out through stdout
+    try:
+        cp = subprocess.run(
+            ["node", "ExtractArticle.js"],
+            cwd=JAVASCRIPT_DIR,
+            check=True,
+            input=html.encode("utf-8"),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout)
+    except subprocess.CalledProcessError as e:
+        print(e.stderr.decode("utf-8", errors="replace"))
+        raise
+    except subprocess.TimeoutExpired as e:
+        raise NodeWorkerTimeoutError(f"Readability.js took longer than {timeout}s") from e
+
+    # Read output of call to Readability.parse() as Python dictionary
+    return json.loads(cp.stdout.decode("utf-8"))
+
+
+async def readability_js_json_async(html, timeout=None):
+    # As readability_js_json but using asyncio subprocess pipes
+    cmd = ["node", "ExtractArticle.js"]
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=JAVASCRIPT_DIR,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(html.encode("utf-8")), timeout)
+    except asyncio.TimeoutError as e:
+        process.kill()
+        await process.wait()
+        raise NodeWorkerTimeoutError(f"Readability.js took longer than {timeout}s") from e
+    if process.returncode != 0:
+        print(stderr.decode("utf-8", errors="replace"))
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return json.loads(stdout.decode("utf-8"))
+
+
+def python_json(html, parser="html5lib", fields=None):
+    # Pure-Python equivalent of the Readability.js fields we use, skipping
+    # the stages which none of the requested fields need.
+    # Title and date extraction share a single lxml parse of the document.
+    # The content is left as the simplified tree so that the plain content
+    # stages can use it without serialising and re-parsing it.
+    fields = checked_fields(fields)
+    input_json = {}
+    if "title" in fields or "date" in fields:
+        lxml_html = parse_html(html)
+        input_json["title"] = extract_title(lxml_html)
+        input_json["date"] = extract_date(lxml_html)
+    if "content" in fields or "plain_content" in fields or "plain_text" in fields:
+        input_json["content"] = simple_tree_from_html_string(html, parser)
+    return input_json
+
+
+def python_article_json(html, content_digests, node_indexes, parser="html5lib", fields=None):
+    return article_json_from_input(python_json(html, parser, fields), content_digests, node_indexes, False, fields)
+
+
+def article_json_from_input(input_json, content_digests, node_indexes, use_readability, fields=None):
     # Only keep the subset of Readability.js fields we are using (and therefore testing for accuracy of extraction)
     # NB: Need to add tests for additional fields and include them when we look at packaging this wrapper up for PyPI
-    # Initialise output article to include all fields with null values
-    article_json = {
-        "title": None,
-        "byline": None,
-        "date": None,
-        "content": None,
-        "plain_content": None,
-        "plain_text": None
-    }
-    # Populate article fields from readability fields where present
-    if input_json:
-        if "title" in input_json and input_json["title"]:
-            article_json["title"] = input_json["title"]
-        if "byline" in input_json and input_json["byline"]:
-            article_json["byline"] = input_json["byline"]
-        if "date" in input_json and input_json["date"]:
-            article_json["date"] = input_json["date"]
-        if "content" in input_json and input_json["content"]:
-            article_json["content"] = input_json["content"]
-            article_json["plain_content"] = plain_content(article_json["content"], content_digests, node_indexes)
-            if use_readability:
-                article_json["plain_text"] = extract_text_blocks_js(article_json["plain_content"])
+    # Build every field straight away, in order
+    return dict(ArticleResult(input_json, content_digests, node_indexes, use_readability, fields))
+
+
+# Marks article fields which have not been computed yet
+NOT_COMPUTED = object()
+
+
+class ArticleResult(Mapping):  # pylint: disable=too-many-instance-attributes
+    """A read-only mapping with the same fields as the article dictionary.
+
+    The title, byline and date are available straight away, while content,
+    plain_content and plain_text (including any digests) are only computed
+    when first accessed. Documents which are discarded based on their
+    metadata therefore skip most of the work. Pass `lazy=True` to
+    `simple_json_from_html_string` to get one, and use `dict(result)` to
+    compute all the fields at once.
+    """
+
+    __slots__ = ("_fields", "_source", "_content_digests", "_node_indexes", "_use_readability", "_plain_tree",
+                 "_title", "_byline", "_date", "_content", "_plain_content", "_plain_text")
+
+    def __init__(self, input_json, content_digests, node_indexes, use_readability, fields=None):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        if content_digests:
+            # Check the digest algorithm before doing any work
+            digest_hash(digest_algorithm(content_digests))
+        input_json = input_json or {}
+        self._fields = checked_fields(fields)
+        # The content is either HTML or, from python_json, the simplified tree itself.
+        # In both cases the plain content and plain text are built from a live tree
+        # and only serialised once at the end.
+        self._source = input_json.get("content") or None
+        self._content_digests = content_digests
+        self._node_indexes = node_indexes
+        self._use_readability = use_readability
+        self._plain_tree = None
+        self._title = input_json.get("title") or None
+        self._byline = input_json.get("byline") or None
+        self._date = input_json.get("date") or None
+        self._content = NOT_COMPUTED
+        self._plain_content = NOT_COMPUTED
+        self._plain_text = NOT_COMPUTED
+
+    def __getitem__(self, field):
+        if field not in self._fields:
+            raise KeyError(field)
+        if field == "content":
+            self._compute_content()
+        elif field == "plain_content":
+            self._compute_plain_content()
+        elif field == "plain_text":
+            self._compute_plain_text()
+        return getattr(self, "_" + field)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(title={self._title!r}, fields={self._fields!r})"
+
+    def _compute_content(self):
+        if self._content is NOT_COMPUTED:
+            self._content = str(self._source) if self._source else None
+
+    def _plain_content_tree(self):
+        if self._plain_tree is None:
+            # Making the content plain modifies the simplified tree, so the content must be serialised first
+            if "content" in self._fields:
+                self._compute_content()
+            # Digests only appear in plain_content so skip them if it is not wanted
+            content_digests = self._content_digests if "plain_content" in self._fields else False
+            self._plain_tree = plain_content_tree(self._source, content_digests, self._node_indexes)
+        return self._plain_tree
+
+    def _compute_plain_content(self):
+        if self._plain_content is NOT_COMPUTED:
+            self._plain_content = str(self._plain_content_tree()) if self._source else None
+
+    def _compute_plain_text(self):
+        if self._plain_text is NOT_COMPUTED:
+            if not self._source:
+                self._plain_text = None
+                return
+            # Extracting the text blocks modifies the plain content tree, so it must be serialised first
+            if "plain_content" in self._fields:
+                self._compute_plain_content()
+            if self._use_readability:
+                self._plain_text = extract_text_blocks_js(self._plain_content_tree())
             else:
-                article_json["plain_text"] = extract_text_blocks_as_plain_text(article_json["plain_content"])
-
-    return article_json
+                self._plain_text = extract_text_blocks_as_plain_text(self._plain_content_tree())
+            # Nothing else needs the trees
+            self._source = self._plain_tree = None
 
 
 def extract_text_blocks_js(paragraph_html):
     # Load article as DOM
-    soup = BeautifulSoup(paragraph_html, 'html.parser')
+    soup = html_parser_tree(paragraph_html)
     # Select all text blocks
     text_blocks = [{"text": str(s)} for s in soup.find_all(string=True)]
     return text_blocks
@@ -121,25 +378,29 @@ def extract_text_blocks_js(paragraph_html):
 
 def extract_text_blocks_as_plain_text(paragraph_html):
     # Load article as DOM
-    soup = BeautifulSoup(paragraph_html, 'html.parser')
+    soup = html_parser_tree(paragraph_html)
     # Select all lists
     list_elements = soup.find_all(['ul', 'ol'])
     # Prefix text in all list items with "* " and make lists paragraphs
     for list_element in list_elements:
-        plain_items = "".join(list(filter(None, [plain_text_leaf_node(li)["text"] for li in list_element.find_all('li')])))
+        list_items = list_element.find_all('li')
+        plain_texts = normalise_texts(li.get_text() for li in list_items)
+        plain_items = "".join(list(filter(None, [plain_text_leaf_node(li, plain_text)["text"] for li, plain_text in zip(list_items, plain_texts)])))
         list_element.string = plain_items
         list_element.name = "p"
     # Select all text blocks
     text_blocks = [s.parent for s in soup.find_all(string=True)]
-    text_blocks = [plain_text_leaf_node(block) for block in text_blocks]
+    plain_texts = normalise_texts(block.get_text() for block in text_blocks)
+    text_blocks = [plain_text_leaf_node(block, plain_text) for block, plain_text in zip(text_blocks, plain_texts)]
     # Drop empty paragraphs
     text_blocks = list(filter(lambda p: p["text"] is not None, text_blocks))
     return text_blocks
 
 
-def plain_text_leaf_node(element):
-    # Extract all text, stripped of any child HTML elements and normalise it
-    plain_text = normalise_text(element.get_text())
+def plain_text_leaf_node(element, plain_text=None):
+    # Extract all text, stripped of any child HTML elements and normalise it (unless this was already done in a batch)
+    if plain_text is None:
+        plain_text = normalise_text(element.get_text())
     if plain_text != "" and element.name == "li":
         plain_text = f"* {plain_text}, "
     if plain_text == "":
@@ -152,36 +413,113 @@ def plain_text_leaf_node(element):
 
 
 def plain_content(readability_content, content_digests, node_indexes):
+    return str(plain_content_tree(readability_content, content_digests, node_indexes))
+
+
+def plain_content_tree(readability_content, content_digests, node_indexes):
     # Load article as DOM
-    soup = BeautifulSoup(readability_content, 'html.parser')
-    # Make all elements plain
-    elements = plain_elements(soup.contents, content_digests, node_indexes)
+    soup = html_parser_tree(readability_content)
+    # Normalise all the text in one batch then make all elements plain
+    normalised_texts = iter(normalise_texts(plain_texts(soup.contents)))
+    elements = plain_elements(soup.contents, content_digests, node_indexes, normalised_texts)
     if node_indexes:
         # Add node index attributes to nodes
         elements = [add_node_indexes(element) for element in elements]
     # Replace article contents with plain elements
-    soup.contents = elements
-    return str(soup)
+    soup.clear()
+    soup.extend(elements)
+    return soup
+
+
+def html_parser_tree(html):
+    # Parse HTML with html.parser. A tree is used as it is, after making it
+    # match the tree that parsing its HTML with html.parser would give.
+    if isinstance(html, str):
+        return BeautifulSoup(html, 'html.parser')
+    soup = html
+    if not isinstance(soup, BeautifulSoup):
+        soup = BeautifulSoup("", 'html.parser')
+        soup.append(html)
+    match_reparsed_strings(soup)
+    return soup
+
+
+def match_reparsed_strings(soup):
+    # Make the strings in a tree match those that html.parser gives when
+    # parsing its HTML again: consecutive strings are joined, empty strings
+    # dropped and, outside <pre> and <textarea>, strings and comments with
+    # only whitespace become a single space or newline. Strings also take
+    # the class that html.parser uses for their container (e.g. <rt>), which
+    # decides whether get_text() includes them.
+    builder = HTML_PARSER.builder
+    string_containers = getattr(builder, "string_containers", {})
+    stack = [(soup, NavigableString, False)]
+    while stack:
+        element, string_class, preserve_whitespace = stack.pop()
+        run = []
+        for child in list(element.contents) + [None]:
+            if is_text(child) and not isinstance(child, PreformattedString):
+                run.append(child)
+                continue
+            if run:
+                match_reparsed_run(run, string_class, preserve_whitespace)
+                run = []
+            if isinstance(child, PreformattedString):
+                if not preserve_whitespace and is_ascii_whitespace(child):
+                    child.replace_with(type(child)("\n" if "\n" in child else " "))
+            elif child is not None:
+                stack.append((child, string_containers.get(child.name, string_class), preserve_whitespace or child.name in builder.preserve_whitespace_tags))
+
+
+def match_reparsed_run(run, string_class, preserve_whitespace):
+    # Replace a run of consecutive strings by the single string html.parser would give
+    text = "".join(run)
+    if text and not preserve_whitespace and is_ascii_whitespace(text):
+        text = "\n" if "\n" in text else " "
+    for string in run[1:]:
+        string.extract()
+    if not text:
+        run[0].extract()
+    elif len(run) > 1 or run[0].__class__ is not string_class or run[0] != text:
+        run[0].replace_with(string_class(text))
+
+
+def is_ascii_whitespace(text):
+    return not text.strip(" \n\t\f\r")
+
+
+def plain_texts(elements):
+    # Yield the texts that plain_elements normalises, in the order that it normalises them
+    for element in elements:
+        if is_leaf(element):
+            yield element.get_text()
+        elif is_text(element):
+            if not is_non_printing(element):
+                yield element.string
+        else:
+            yield from plain_texts(element.contents)
 
 
-def plain_elements(elements, content_digests, node_indexes):
+def plain_elements(elements, content_digests, node_indexes, normalised_texts=None):
     # Get plain content versions of all elements
-    elements = [plain_element(element, content_digests, node_indexes)
+    # Digests are added to the whole subtree below in one pass at the end,
+    # rather than at every level of the recursion
+    elements = [plain_element(element, False, node_indexes, normalised_texts)
                 for element in elements]
     if content_digests:
         # Add content digest attribute to nodes
-        elements = [add_content_digest(element) for element in elements]
+        elements = add_content_digests(elements, digest_algorithm(content_digests))
     return elements
 
 
-def plain_element(element, content_digests, node_indexes):
+def plain_element(element, content_digests, node_indexes, normalised_texts=None):
+    # If normalised_texts is given, it is an iterator over the output of plain_texts already normalised in a batch
     # For lists, we make each item plain text
     if is_leaf(element):
         # For leaf node elements, extract the text content, discarding any HTML tags
         # 1. Get element contents as text
-        plain_text = element.get_text()
         # 2. Normalise the extracted text string to a canonical representation
-        plain_text = normalise_text(plain_text)
+        plain_text = normalise_text(element.get_text()) if normalised_texts is None else next(normalised_texts)
         # 3. Update element content to be plain text
         element.string = plain_text
     elif is_text(element):
@@ -191,12 +529,11 @@ def plain_element(element, content_digests, node_indexes):
             # keep the structure, but ensure that the string is empty.
             element = type(element)("")
         else:
-            plain_text = element.string
-            plain_text = normalise_text(plain_text)
+            plain_text = normalise_text(element.string) if normalised_texts is None else next(normalised_texts)
             element = type(element)(plain_text)
     else:
         # If not a leaf node or leaf type call recursively on child nodes, replacing
-        plain_conents = plain_elements(element.contents, content_digests, node_indexes)
+        plain_conents = plain_elements(element.contents, content_digests, node_indexes, normalised_texts)
         element.clear()
         element.extend(plain_conents)
     return element
@@ -229,20 +566,69 @@ def add_node_indexes(element, node_index="0"):
     return element
 
 
-def add_content_digest(element):
-    if not is_text(element):
-        element["data-content-digest"] = content_digest(element)
+def add_content_digest(element, algorithm="sha256"):
+    # Add content digest attributes to a single element and all elements below it
+    add_content_digests([element], algorithm)
     return element
 
 
-def content_digest(element):
+def add_content_digests(elements, algorithm="sha256"):
+    # Add content digest attributes to the elements and all elements below
+    # them, visiting children before parents so that each digest is computed
+    # once and reused by the parent
+    digests = {}
+    stack = [(element, False) for element in reversed(elements)]
+    while stack:
+        element, children_done = stack.pop()
+        if is_text(element):
+            continue
+        if children_done:
+            element["data-content-digest"] = content_digest(element, digests, algorithm)
+        else:
+            stack.append((element, True))
+            stack.extend((child, False) for child in element.contents)
+    return elements
+
+
+def digest_algorithm(content_digests):
+    # content_digests is either True for the default SHA-256 digests or the name of a hash algorithm
+    return "sha256" if content_digests is True else content_digests
+
+
+@functools.lru_cache(maxsize=None)
+def digest_hash(algorithm):
+    # Return a constructor for the named hashlib algorithm. The BLAKE2
+    # algorithms can be given a digest size in bytes, e.g. "blake2b-16".
+    name, _, digest_size = algorithm.partition("-")
+    error = ValueError(f"Unsupported content digest algorithm '{algorithm}'")
+    if name in ("blake2b", "blake2s") and digest_size:
+        if not digest_size.isdigit():
+            raise error
+        new_hash = functools.partial(getattr(hashlib, name), digest_size=int(digest_size))
+    elif name in hashlib.algorithms_available and not digest_size:
+        new_hash = getattr(hashlib, name, None) or functools.partial(hashlib.new, name)
+    else:
+        raise error
+    try:
+        # Fails for invalid BLAKE2 digest sizes and for variable length algorithms such as SHAKE
+        new_hash().hexdigest()
+    except (ValueError, TypeError) as e:
+        raise error from e
+    return new_hash
+
+
+def content_digest(element, digests=None, algorithm="sha256"):
+    # digests optionally caches the digest of each element by id
+    if digests is not None and id(element) in digests:
+        return digests[id(element)]
+    new_hash = digest_hash(algorithm)
     if is_text(element):
         # Hash
         trimmed_string = element.string.strip()
         if trimmed_string == "":
             digest = ""
         else:
-            digest = hashlib.sha256(trimmed_string.encode('utf-8')).hexdigest()
+            digest = new_hash(trimmed_string.encode('utf-8')).hexdigest()
     else:
         contents = element.contents
         num_contents = len(contents)
@@ -251,13 +637,15 @@ def content_digest(element):
             digest = ""
         elif num_contents == 1:
             # If single child, use digest of child
-            digest = content_digest(contents[0])
+            digest = content_digest(contents[0], digests, algorithm)
         else:
             # Build content digest from the "non-empty" digests of child nodes
-            digest = hashlib.sha256()
+            digest = new_hash()
             child_digests = list(
-                filter(lambda x: x != "", [content_digest(content) for content in contents]))
+                filter(lambda x: x != "", [content_digest(content, digests, algorithm) for content in contents]))
             for child in child_digests:
                 digest.update(child.encode('utf-8'))
             digest = digest.hexdigest()
+    if digests is not None:
+        digests[id(element)] = digest
     return digest
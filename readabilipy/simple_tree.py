@@ -1,33 +1,35 @@
 """Turn input HTML into a cleaned parsed tree."""
 from bs4 import BeautifulSoup
-from .simplifiers.html import consolidate_text, insert_paragraph_breaks, normalise_strings, process_special_elements, process_unknown_elements, recursively_prune_elements, remove_blacklist, remove_empty_strings_and_elements, remove_metadata, strip_attributes, structural_elements, unnest_paragraphs, unwrap_elements, wrap_bare_text
+from .simplifiers.html import clean_elements, consolidate_text, insert_paragraph_breaks, normalise_strings, recursively_prune_elements, remove_empty_strings_and_elements, structural_elements, unnest_paragraphs, wrap_bare_text
 
 
-def simple_tree_from_html_string(html):
-    """Turn input HTML into a cleaned parsed tree."""
-    # Insert space into non-spaced comments so that html5lib can interpret them correctly
-    html = html.replace("<!---->", "<!-- -->")
-
-    # Convert the HTML into a Soup parse tree
-    soup = BeautifulSoup(html, "html5lib")
-
-    # Remove comments, CDATA (which is converted to comments) and DOCTYPE
-    remove_metadata(soup)
+def parsers():
+    """BeautifulSoup tree builders which can be used to parse the input HTML.
+    html5lib is the default as it parses exactly as a browser would, while lxml
+    is several times faster at the cost of strict HTML5 conformance."""
+    return ['html5lib', 'lxml', 'html.parser']
 
-    # Strip tag attributes apart from 'class' and 'style'
-    strip_attributes(soup)
 
-    # Remove blacklisted elements
-    remove_blacklist(soup)
-
-    # Unwrap elements where we want to keep the text but drop the containing tag
-    unwrap_elements(soup)
+def simple_tree_from_html_string(html, parser="html5lib"):
+    """Turn input HTML into a cleaned parsed tree."""
+    if parser not in parsers():
+        raise ValueError(f"Unknown parser '{parser}', expected one of {', '.join(parsers())}")
 
-    # Process elements with special innerText handling
-    process_special_elements(soup)
+    # Insert space into non-spaced comments so that html5lib can interpret them correctly
+    if parser == "html5lib":
+        html = html.replace("<!---->", "<!-- -->")
 
-    # Process unknown elements
-    process_unknown_elements(soup)
+    # Convert the HTML into a Soup parse tree
+    soup = BeautifulSoup(html, parser)
+
+    # In a single pass over the tree:
+    # - remove comments, CDATA (which is converted to comments) and DOCTYPE
+    # - strip 'class' and 'style' tag attributes
+    # - remove blacklisted elements
+    # - unwrap elements where we want to keep the text but drop the containing tag
+    # - process elements with special innerText handling
+    # - unwrap unknown elements
+    clean_elements(soup)
 
     # Consolidate text, joining any consecutive NavigableStrings together.
     # Must come before any whitespace operations (eg. remove_empty_strings_and_elements or normalise_strings)
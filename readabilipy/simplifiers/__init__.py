@@ -1,9 +1,12 @@
-from .text import normalise_text, normalise_unicode, normalise_whitespace, strip_control_characters, strip_html_whitespace
+from .text import configure_text_cache, normalise_text, normalise_texts, normalise_unicode, normalise_whitespace, strip_control_characters, strip_html_whitespace, text_cache_info
 
 __all__ = [
+    "configure_text_cache",
     "normalise_text",
+    "normalise_texts",
     "normalise_unicode",
     "normalise_whitespace",
     "strip_control_characters",
     "strip_html_whitespace",
+    "text_cache_info",
 ]
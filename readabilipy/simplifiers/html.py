@@ -1,6 +1,6 @@
 """Common HTML cleaning functions."""
-from bs4 import Comment, Doctype, NavigableString
-from .text import normalise_text
+from bs4 import Comment, Doctype, NavigableString, Tag
+from .text import normalise_texts
 
 
 def elements_to_delete():
@@ -133,6 +133,49 @@ def process_unknown_elements(soup):
             element.unwrap()
 
 
+def clean_elements(soup):
+    """Single-traversal equivalent of remove_metadata, strip_attributes,
+    remove_blacklist, unwrap_elements, process_special_elements and
+    process_unknown_elements, applied in that order.
+
+    Each node is classified once as the tree is walked: metadata is removed,
+    blacklisted elements are deleted without visiting their contents and the
+    attributes of everything else are stripped. Elements to be flattened are
+    unwrapped once the walk is finished. Unwrapping only replaces an element
+    by its contents in place, so the result does not depend on the order in
+    which this happens and is identical to running the separate functions."""
+    to_delete = frozenset(elements_to_delete())
+    to_unwrap = frozenset(elements_to_replace_with_contents() + special_elements())
+    known = frozenset(known_elements())
+    flattened = []
+    # Walk the tree in document order using an explicit stack so that deeply nested pages cannot hit the recursion limit
+    stack = list(reversed(soup.contents))
+    while stack:
+        element = stack.pop()
+        if isinstance(element, NavigableString):
+            if isinstance(element, (Comment, Doctype)):
+                element.extract()
+            continue
+        if element.name in to_delete:
+            element.decompose()
+            continue
+        element.attrs.pop("class", None)
+        element.attrs.pop("style", None)
+        # Insert appropriate strings before and/or after the contents of special elements
+        if element.name == 'q':
+            element.insert_before(NavigableString('"'))
+            element.insert_after(NavigableString('"'))
+        elif element.name == 'sub':
+            element.insert_before(NavigableString('_'))
+        elif element.name == 'sup':
+            element.insert_before(NavigableString('^'))
+        if element.name in to_unwrap or element.name not in known:
+            flattened.append(element)
+        stack.extend(reversed(element.contents))
+    for element in flattened:
+        element.unwrap()
+
+
 def consolidate_text(soup):
     """Join any consecutive NavigableStrings together."""
     # Iterate over all strings in the tree
@@ -147,8 +190,10 @@ def consolidate_text(soup):
 def remove_empty_strings_and_elements(soup):
     """Remove any strings which contain only whitespace. Without this,
     consecutive linebreaks may not be identified correctly."""
-    for element in list(soup.descendants):
-        if not normalise_text(str(element)):
+    # Elements are never empty as their string form includes their tags, so only strings need checking
+    strings = [element for element in soup.descendants if isinstance(element, NavigableString)]
+    for element, text in zip(strings, normalise_texts(strings)):
+        if not text:
             element.extract()
 
 
@@ -157,26 +202,138 @@ def unnest_paragraphs(soup):
     illegal_elements = ["address", "article", "aside", "blockquote", "canvas", "dd", "div", "dl", "dt", "fieldset",
                         "figcaption", "figure", "footer", "form", "h1>-<h6", "header", "hr", "li", "main", "nav",
                         "noscript", "ol", "p", "pre", "section", "table", "tfoot", "ul", "video"]
+    # Find which illegal elements actually occur inside a paragraph in a single pass over the tree.
+    # Splitting paragraphs only moves these elements around, so no other types need processing.
+    nested_types = {element.name for element in soup.find_all(illegal_elements) if element.find_parent('p')}
     for nested_type in illegal_elements:
-        # Search for nested elements that need to be split out
-        nested_elements = [e for e in soup.find_all('p') if e.find(nested_type)]
-        while nested_elements:
-            # Separate this element into the nested element, plus before and after
-            elem_nested = nested_elements[0].find(nested_type)
-            p_before = soup.new_tag("p")
-            for sibling in list(elem_nested.previous_siblings):
-                p_before.append(sibling)
-            p_after = soup.new_tag("p")
-            for sibling in list(elem_nested.next_siblings):
-                p_after.append(sibling)
-            # Replace element by before/nested/after.
-            # NB. this is done in reverse order as we are adding after the current position
-            nested_elements[0].insert_after(p_after)
-            nested_elements[0].insert_after(elem_nested)
-            nested_elements[0].insert_after(p_before)
-            nested_elements[0].decompose()
-            # Rerun search for nested elements now that we have rewritten the tree
-            nested_elements = [e for e in soup.find_all('p') if e.find(nested_type)]
+        if nested_type in nested_types:
+            unnest_nested_type(soup, nested_type)
+
+
+def unnest_nested_type(soup, nested_type):
+    """Split every paragraph containing nested_type, visiting the paragraphs in document order.
+
+    Each split paragraph is replaced by the pieces from split_paragraph, which are then visited in turn.
+    The new children of each element are collected and set once, rather than splicing in the pieces of
+    every paragraph separately, which would make documents with many sibling paragraphs quadratic."""
+    # Each frame holds the nodes left to visit, the nodes replacing those already visited, the element whose
+    # contents they become and whether they differ from its contents. Frames for the pieces of a split
+    # paragraph have no element, and their nodes replace the paragraph in the frame below.
+    stack = [[iter(soup.contents), [], soup, False]]
+    changed = False
+    while stack:
+        nodes, replacements, element, element_changed = stack[-1]
+        node = next(nodes, None)
+        if node is None:
+            stack.pop()
+            if element is None:
+                stack[-1][1].extend(replacements)
+                stack[-1][3] = changed = True
+                continue
+            if element_changed:
+                set_contents(element, replacements)
+            if stack:
+                stack[-1][1].append(element)
+        elif not isinstance(node, Tag):
+            replacements.append(node)
+        else:
+            pieces = split_paragraph(soup, node, nested_type) if node.name == "p" else None
+            if pieces is None:
+                stack.append([iter(node.contents), [], node, False])
+            else:
+                stack.append([iter(pieces), [], None, False])
+    if changed:
+        relink_elements(soup)
+
+
+def split_paragraph(soup, paragraph, nested_type):
+    """Split a paragraph around the first element of nested_type that it contains.
+
+    Returns the elements that replace the paragraph, or None if it does not contain nested_type. When the
+    nested element is a direct child the paragraph is split around every direct child of nested_type up to
+    the first child containing one further down. Otherwise only the siblings of the nested element are kept.
+    The paragraph and the tree around it are left as they are."""
+    found = find_first(paragraph, nested_type)
+    if found is None:
+        return None
+    elem_nested, parent = found
+    if parent is not paragraph:
+        position = next(idx for idx, sibling in enumerate(parent.contents) if sibling is elem_nested)
+        # The siblings before are kept nearest first
+        return [new_paragraph(soup, parent.contents[:position][::-1]),
+                elem_nested,
+                new_paragraph(soup, parent.contents[position + 1:])]
+
+    pieces = []
+    siblings_before = []
+    for idx, child in enumerate(paragraph.contents):
+        if child.name == nested_type:
+            # As above, the siblings before are kept nearest first
+            pieces += [new_paragraph(soup, siblings_before[::-1]), child]
+            siblings_before = []
+        elif isinstance(child, Tag) and find_first(child, nested_type):
+            # The rest of the paragraph is split again when its piece is visited
+            siblings_before += paragraph.contents[idx:]
+            break
+        else:
+            siblings_before.append(child)
+    pieces.append(new_paragraph(soup, siblings_before))
+    return pieces
+
+
+def find_first(element, name):
+    """Find the first descendant of element with the given name in document order, and its parent.
+
+    This follows the contents of each element, rather than the parse order links used by find(), so it
+    works on the partly rebuilt tree inside unnest_nested_type."""
+    stack = [(child, element) for child in reversed(element.contents) if isinstance(child, Tag)]
+    while stack:
+        child, parent = stack.pop()
+        if child.name == name:
+            return child, parent
+        stack.extend((grandchild, child) for grandchild in reversed(child.contents) if isinstance(grandchild, Tag))
+    return None
+
+
+def new_paragraph(soup, children):
+    """Create a new paragraph containing children."""
+    paragraph = soup.new_tag("p")
+    set_contents(paragraph, children)
+    return paragraph
+
+
+def set_contents(element, children):
+    """Make children the contents of element, setting their parent and sibling links.
+
+    Unlike extract() and append(), this never looks up a child's position in its old parent. The old parents
+    are left stale so must be discarded, and relink_elements must be called once the tree is complete."""
+    element.contents = list(children)
+    previous = None
+    for child in element.contents:
+        child.parent = element
+        child.previous_sibling = previous
+        if previous is not None:
+            previous.next_sibling = child
+        previous = child
+    if previous is not None:
+        previous.next_sibling = None
+
+
+def relink_elements(soup):
+    """Rebuild the next_element and previous_element links, which follow document order, from the tree."""
+    # Depending on the parser the chain may or may not start from the BeautifulSoup object itself
+    previous = soup if soup.next_element is not None else None
+    stack = list(reversed(soup.contents))
+    while stack:
+        node = stack.pop()
+        if previous is not None:
+            previous.next_element = node
+        node.previous_element = previous
+        previous = node
+        if isinstance(node, Tag):
+            stack.extend(reversed(node.contents))
+    if previous is not None:
+        previous.next_element = None
 
 
 def insert_paragraph_breaks(soup):
@@ -238,11 +395,9 @@ def insert_paragraph_breaks(soup):
 
 def normalise_strings(soup):
     """Remove extraneous whitespace and fix unicode issues in all strings."""
-    # Iterate over all strings in the tree (including bare strings outside tags)
-    for element in soup.find_all(string=True):
-        # Treat Beautiful Soup text elements as strings when normalising since normalisation returns a copy of the string
-        text = str(element)
-        normalised_text = normalise_text(text)
+    # Normalise all strings in the tree (including bare strings outside tags) together
+    strings = soup.find_all(string=True)
+    for element, normalised_text in zip(strings, normalise_texts(strings)):
         # Replace the element with a new string element of the same type, but containing the normalised text
         element.replace_with(type(element)(normalised_text))
 
@@ -293,17 +448,26 @@ def wrap_bare_text(soup):
 
 def recursively_prune_elements(soup):
     """Recursively prune out any elements which have no children or only zero-length children."""
-    def single_replace():
-        n_removed = 0
-        # Remove elements with no children
-        for element in soup.find_all(lambda elem: len(list(elem.children)) == 0):
-            element.decompose()
-            n_removed += 1
-        # Remove elements with only zero-length children
-        for element in soup.find_all(lambda elem: sum(len(c) for c in elem.children) == 0):
-            element.decompose()
-            n_removed += 1
-        return n_removed
-    # Repeatedly apply single_replace() until no elements are being removed
-    while single_replace():
-        pass
+    # An element survives pruning only if it has a non-empty string or a surviving element among its
+    # children, so a single post-order walk decides every element before anything is removed
+    survivors = {id(soup)}
+    kept_elements = []
+    stack = [(soup, False)]
+    while stack:
+        element, children_done = stack.pop()
+        if not children_done:
+            stack.append((element, True))
+            stack.extend((child, False) for child in element.contents if isinstance(child, Tag))
+        elif element is soup or any(id(child) in survivors if isinstance(child, Tag) else len(child) for child in element.contents):
+            survivors.add(id(element))
+            kept_elements.append(element)
+    # Drop the pruned children of each surviving element, each of which takes its whole subtree with it,
+    # setting the contents once rather than extracting the children one at a time
+    pruned = False
+    for element in kept_elements:
+        children = [c for c in element.contents if not isinstance(c, Tag) or id(c) in survivors]
+        if len(children) < len(element.contents):
+            set_contents(element, children)
+            pruned = True
+    if pruned:
+        relink_elements(soup)
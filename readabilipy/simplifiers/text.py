@@ -1,10 +1,100 @@
 """Common text manipulation functions."""
+import functools
+import threading
 import unicodedata
+from collections import OrderedDict
 import regex
 
 matched_punctuation_marks = [('“', '”'), ('‘', '’'), ('(', ')'), ('[', ']'), ('{', '}')]
 terminal_punctuation_marks = ['.', ',', '!', ':', ';', '?']
 
+# Unicode control characters
+#   [Cc]: Other, Control [includes new lines]
+#   [Cf]: Other, Format
+#   [Cn]: Other, Not Assigned
+#   [Co]: Other, Private Use
+#   [Cs]: Other, Surrogate
+control_categories = frozenset(['Cc', 'Cf', 'Cn', 'Co', 'Cs'])
+retained_control_characters = frozenset(['\t', '\n', '\r', '\f'])
+whitespace_pattern = regex.compile(r"\s+")
+# Separates texts which are normalised together. It is a private use character so normalise_text() would strip
+# it, but it is neither whitespace nor affected by NFKC, and as a starter it blocks composition across texts.
+batch_separator = "\ue000"
+
+
+class TextCache:
+    """A size-bounded LRU cache of normalised texts with hit and miss counters. It is disabled while maxsize is 0."""
+
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._texts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text):
+        """Return the cached normalised text, or None if it is not in the cache."""
+        return self.get_many([text])[0]
+
+    def get_many(self, texts):
+        """Return the cached normalised text for each text, or None for those which are not in the cache."""
+        with self._lock:
+            normalised_texts = [self._texts.get(text) for text in texts]
+            for text, normalised in zip(texts, normalised_texts):
+                if normalised is not None:
+                    self._texts.move_to_end(text)
+            n_misses = normalised_texts.count(None)
+            self.misses += n_misses
+            self.hits += len(texts) - n_misses
+            return normalised_texts
+
+    def put(self, text, normalised):
+        self.put_many([text], [normalised])
+
+    def put_many(self, texts, normalised_texts):
+        with self._lock:
+            for text, normalised in zip(texts, normalised_texts):
+                # Copy the key to a plain str so that the cache does not keep a parse tree alive through a NavigableString
+                self._texts[str(text)] = normalised
+                self._texts.move_to_end(text)
+            self._evict()
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._texts.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "size": len(self._texts)}
+
+    def _evict(self):
+        while len(self._texts) > self.maxsize:
+            self._texts.popitem(last=False)
+
+
+text_cache = TextCache()
+
+
+def configure_text_cache(maxsize):
+    """Memoise normalised texts for this process in an LRU cache of up to maxsize entries. Set maxsize to 0 to disable it.
+
+    Pages from the same site repeat the same boilerplate many times, which then costs a lookup rather than normalisation.
+    """
+    if maxsize < 0:
+        raise ValueError("Text cache size must not be negative")
+    text_cache.resize(maxsize)
+
+
+def text_cache_info():
+    """Return the hits, misses, maxsize and current size of the normalised text cache."""
+    return text_cache.info()
+
 
 def normalise_unicode(text):
     """Normalise unicode such that things that are visually equivalent map to the same unicode string where possible."""
@@ -15,7 +105,7 @@ def normalise_unicode(text):
 
 def normalise_whitespace(text):
     """Replace runs of whitespace characters with a single space as this is what happens when HTML text is displayed."""
-    text = regex.sub(r"\s+", " ", text)
+    text = whitespace_pattern.sub(" ", text)
     # Remove leading and trailing whitespace
     text = text.strip()
     return text
@@ -23,13 +113,68 @@ def normalise_whitespace(text):
 
 def normalise_text(text):
     """Normalise unicode and whitespace."""
+    if text_cache.maxsize:
+        normalised = text_cache.get(text)
+        if normalised is None:
+            normalised = normalise_text_uncached(text)
+            text_cache.put(text, normalised)
+        return normalised
+    return normalise_text_uncached(text)
+
+
+def normalise_text_uncached(text):
+    """Normalise unicode and whitespace without using the text cache."""
     # Normalise unicode first to try and standardise whitespace characters as much as possible before normalising them
     text = strip_control_characters(text)
+    if is_ascii(text):
+        # ASCII text is already in NFKC form, and once control characters are stripped its only whitespace
+        # characters are the ones that str.split() splits on, so this matches normalise_whitespace()
+        return " ".join(text.split())
     text = normalise_unicode(text)
     text = normalise_whitespace(text)
     return text
 
 
+def normalise_texts(texts):
+    """Normalise unicode and whitespace in a list of texts, giving the same result as calling normalise_text() on each.
+
+    This joins the texts and normalises them in one pass, so is much faster than normalise_text() for many short texts.
+    """
+    texts = list(texts)
+    if text_cache.maxsize:
+        # Only normalise the texts which are not already in the cache
+        normalised_texts = text_cache.get_many(texts)
+        missing = [idx for idx, normalised in enumerate(normalised_texts) if normalised is None]
+        missing_texts = [texts[idx] for idx in missing]
+        missing_normalised_texts = normalise_texts_uncached(missing_texts)
+        for idx, normalised in zip(missing, missing_normalised_texts):
+            normalised_texts[idx] = normalised
+        text_cache.put_many(missing_texts, missing_normalised_texts)
+        return normalised_texts
+    return normalise_texts_uncached(texts)
+
+
+def normalise_texts_uncached(texts):
+    """Normalise a list of texts in one pass without using the text cache."""
+    if not texts:
+        return []
+    joined = batch_separator.join(texts)
+    if joined.count(batch_separator) != len(texts) - 1:
+        # The separator occurs in the texts themselves so we cannot split them apart again
+        return [normalise_text_uncached(text) for text in texts]
+    control_chars = [char for char in set(joined) if char != batch_separator and is_control_character(char)]
+    if control_chars:
+        joined = joined.translate(dict.fromkeys(map(ord, control_chars)))
+    joined = normalise_unicode(joined)
+    joined = whitespace_pattern.sub(" ", joined)
+    return [text.strip() for text in joined.split(batch_separator)]
+
+
+def is_ascii(text):
+    """Check whether the text only contains ASCII characters."""
+    return not text or max(text) < "\x80"
+
+
 def strip_html_whitespace(text):
     """Simplify HTML by stripping whitespace."""
     # Normalise unicode first to try and standardise whitespace characters as much as possible before normalising them
@@ -40,14 +185,14 @@ def strip_html_whitespace(text):
 
 def strip_control_characters(text):
     """Strip out unicode control characters which might break the parsing."""
-    # Unicode control characters
-    #   [Cc]: Other, Control [includes new lines]
-    #   [Cf]: Other, Format
-    #   [Cn]: Other, Not Assigned
-    #   [Co]: Other, Private Use
-    #   [Cs]: Other, Surrogate
-    control_chars = set(['Cc', 'Cf', 'Cn', 'Co', 'Cs'])
-    retained_chars = ['\t', '\n', '\r', '\f']
-
-    # Remove non-printing control characters
-    return "".join(["" if (unicodedata.category(char) in control_chars) and (char not in retained_chars) else char for char in text])
+    # Look up each distinct character once then remove them all in a single str.translate() call
+    control_chars = [char for char in set(text) if is_control_character(char)]
+    if not control_chars:
+        return text
+    return text.translate(dict.fromkeys(map(ord, control_chars)))
+
+
+@functools.lru_cache(maxsize=None)
+def is_control_character(char):
+    """Check whether a character is a non-printing control character."""
+    return unicodedata.category(char) in control_categories and char not in retained_control_characters
@@ -67,3 +67,26 @@ def run_npm_install():
             "Error: Failed to install dependencies with npm. Package will fall back on Python-based extraction.",
             file=sys.stderr,
         )
+
+
+def have_node():
+    """Check that we can run node and have a new enough version """
+    try:
+        cp = subprocess.run(['node', '-v'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    except FileNotFoundError:
+        return False
+
+    if not cp.returncode == 0:
+        return False
+
+    major = int(cp.stdout.split(b'.')[0].lstrip(b'v'))
+    if major < 10:
+        return False
+
+    # check that this package has a node_modules dir in the javascript
+    # directory, if it doesn't, it wasn't installed with Node support
+    node_modules = os.path.join(os.path.dirname(__file__), 'javascript', 'node_modules')
+    if not os.path.exists(node_modules):
+        # Try installing node dependencies.
+        run_npm_install()
+    return os.path.exists(node_modules)
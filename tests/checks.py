@@ -31,7 +31,7 @@ def check_html_output_contains_text(test_fragment, expected_output=None):
     assert normalised_expectation in normalised_result
 
 
-def check_extract_article(test_filename, expected_filename, content_digests=False, node_indexes=False, use_readability_js=False):
+def check_extract_article(test_filename, expected_filename, content_digests=False, node_indexes=False, use_readability_js=False, parser="html5lib"):  # pylint: disable=too-many-arguments,too-many-positional-arguments
     """Test end-to-end article extraction. Ensure that HTML from file matches JSON from file after parsing is applied."""
     test_data_dir = "data"
     # Read HTML test file
@@ -43,7 +43,7 @@ def check_extract_article(test_filename, expected_filename, content_digests=Fals
     if use_readability_js:
         article_json = simple_json_from_html_string(html, content_digests, node_indexes, use_readability=True)
     else:
-        article_json = simple_json_from_html_string(html, content_digests, node_indexes)
+        article_json = simple_json_from_html_string(html, content_digests, node_indexes, parser=parser)
 
     # Get expected simplified article HTML
     expected_filepath = os.path.join(os.path.dirname(__file__), test_data_dir, expected_filename)
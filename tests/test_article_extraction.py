@@ -1,4 +1,5 @@
 """Test readability.py on sample articles"""
+import pytest
 from checks import check_extract_article, check_extract_paragraphs_as_plain_text
 
 
@@ -99,3 +100,18 @@ def test_extract_paragraphs_as_plain_text_node_indexes():
         "list_items_simple_article_from_full_page_node_indexes.json",
         "list_items_plain_text_paragraph_node_indexes.json"
     )
+
+
+# The lxml parser should give identical output on well-formed pages. (It does
+# not match conservativehq.com-1, where html5lib merges the attributes of a
+# second <body> tag into the first.)
+@pytest.mark.parametrize("test_filename, expected_filename, content_digests, node_indexes", [
+    ("addictinginfo.com-1_full_page.html", "addictinginfo.com-1_simple_article_from_full_page.json", False, False),
+    ("addictinginfo.com-1_full_article.html", "addictinginfo.com-1_simple_article_from_full_article.json", False, False),
+    ("non_article_full_page.html", "non_article_full_page.json", False, False),
+    ("list_items_full_page.html", "list_items_simple_article_from_full_page.json", False, False),
+    ("davidwolfe.com-1_full_page.html", "davidwolfe.com-1_simple_article_from_full_page.json", False, False),
+    ("addictinginfo.com-1_full_page.html", "addictinginfo.com-1_simple_article_from_full_page_content_digest_node_indexes.json", True, True),
+])
+def test_extract_article_with_lxml_parser(test_filename, expected_filename, content_digests, node_indexes):
+    check_extract_article(test_filename, expected_filename, content_digests=content_digests, node_indexes=node_indexes, parser="lxml")
@@ -1,6 +1,8 @@
 import os
+from bs4 import BeautifulSoup
 from readabilipy import simple_json_from_html_string
 from readabilipy.extractors import extract_date, extract_title
+from readabilipy.simplifiers import normalise_text, normalise_texts
 
 
 TEST_FILEPATH = os.path.join(os.path.dirname(__file__), "data", "benchmarkinghuge.html")
@@ -18,3 +20,13 @@ def test_benchmark_extract_title(benchmark):
 
 def test_benchmark_extract_date(benchmark):
     benchmark(extract_date, html=HTML)
+
+
+def test_benchmark_normalise_text(benchmark):
+    strings = [str(s) for s in BeautifulSoup(HTML, "html5lib").find_all(string=True)]
+    benchmark(lambda: [normalise_text(s) for s in strings])
+
+
+def test_benchmark_normalise_texts(benchmark):
+    strings = [str(s) for s in BeautifulSoup(HTML, "html5lib").find_all(string=True)]
+    benchmark(normalise_texts, strings)
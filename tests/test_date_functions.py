@@ -1,5 +1,6 @@
 import pytest
-from readabilipy.extractors import extract_date, ensure_iso_date_format
+from readabilipy.extractors import extract_date, ensure_iso_date_format, ensure_iso_date_formats
+from readabilipy.extractors.extract_date import strptime_iso_date
 
 
 htmls_with_expected = [
@@ -80,3 +81,26 @@ def test_ensure_iso_date_format_with_ms():
 @pytest.mark.parametrize("html, expected", [("Hello world", None), ("10/10/2019", None)])
 def test_ensure_iso_date_format_non_iso_string(html, expected):
     assert ensure_iso_date_format(html) == expected
+
+
+@pytest.mark.parametrize("datetime_string", [
+    "2014-10-24T17:32:46", "2014-10-24t17:32:46", "2014-1-2T7:3:4", "2014-10- 2T17:32:46",
+    "2014-10-24T17:32:46+12:00", "2014-10-24T17:32:46-0500", "2014-10-24T17:32:46Z", "2014-10-24T17:32:46z",
+    "2014-10-24T17:32+12:00", "2014-10-24T17:32Z", "2014-10-24T17:32z", "2014-10-24T17:32",
+    "2014-10-24T17:32:46.000Z", "2014-10-24T17:32:46.493z", "2014-10-24T17:32:46.493", "2014-10-24T17:32:46.493+12:00",
+    "2014-02-30T17:32:46", "2014-13-24T17:32:46", "2014-10-24T24:32:46", "2014-10-24T17:32:60",
+    "2014-10-24T17:32:46+24:00", "2014-10-24T17:32:46+12:60", "2014-10-24T17:32:46.1234567", "2014-10-24T17:32:46\n",
+])
+@pytest.mark.parametrize("ignoretz", [True, False])
+def test_ensure_iso_date_format_matches_strptime(datetime_string, ignoretz):
+    isodate = strptime_iso_date(datetime_string)
+    if isodate is not None and ignoretz:
+        isodate = isodate.replace(tzinfo=None, microsecond=0)
+    expected_iso_string = isodate.isoformat() if isodate is not None else None
+    assert ensure_iso_date_format(datetime_string, ignoretz=ignoretz) == expected_iso_string
+
+
+def test_ensure_iso_date_formats():
+    datetime_strings = ["2019-02-18T17:52:10Z", "Hello world", "2014-10-24T17:32+12:00", "2019-02-18T17:52:10Z", "ab"]
+    expected_iso_strings = ["2019-02-18T17:52:10", None, "2014-10-24T17:32:00", "2019-02-18T17:52:10", None]
+    assert ensure_iso_date_formats(datetime_strings) == expected_iso_strings
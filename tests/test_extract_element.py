@@ -1,5 +1,8 @@
 from collections import defaultdict
-from readabilipy.extractors.extract_element import extract_element
+
+import pytest
+from readabilipy.extractors import extract_date, extract_head_metadata, extract_title, parse_html, parse_html_head
+from readabilipy.extractors.extract_element import CompiledXPaths, extract_element
 
 
 def test_extract_element():
@@ -46,3 +49,87 @@ def test_extract_element_with_passed_func():
     expected_output_3['Title 2'] = {'score': 3, 'xpaths': ['//h1[@itemprop="headline"]//text()']}
 
     assert extract_element(html, xpaths, process_dict_fn=process_dict) == expected_output_3
+
+
+def test_extractors_share_parsed_tree():
+    html = """
+            <head>
+                <title>Title 1</title>
+                <meta property="article:published_time" content="2018-10-09T01:03:32" />
+            </head>
+            <body><h1 class="entry-title">Title 1</h1></body>
+    """
+    lxml_html = parse_html(html)
+
+    assert extract_title(lxml_html) == extract_title(html) == "Title 1"
+    assert extract_date(lxml_html) == extract_date(html) == "2018-10-09T01:03:32"
+
+
+def test_unparseable_html_gives_no_tree():
+    assert parse_html("") is None
+    assert extract_element(parse_html(""), [('//title//text()', 1)]) is None
+
+
+def test_head_is_parsed_without_body():
+    html = "<head><title>Title 1</title></head><body>" + "<p>Paragraph</p>" * 10000 + "</body>"
+    lxml_head = parse_html_head(html)
+    assert lxml_head.xpath("//title//text()") == ["Title 1"]
+    assert [element.tag for element in lxml_head] == ["head"]
+    assert not lxml_head.xpath("//p")
+    assert parse_html_head("<p>No head here</p>") is None
+    assert parse_html_head("") is None
+
+
+@pytest.mark.parametrize("padding", [0, 1000, 5000, 50000])
+def test_head_metadata_ignores_body_headings(padding):
+    html = """
+            <head>
+                <title>Site name</title>
+                <meta property="article:published_time" content="2018-10-09T01:03:32" />
+            </head>
+            <body>""" + "<p>Paragraph</p>" * (padding // 16) + """<h1 class="entry-title">Real headline</h1></body>
+    """
+    assert extract_head_metadata(html) == {"title": "Site name", "date": "2018-10-09T01:03:32"}
+
+
+def test_head_metadata_falls_back_to_whole_document():
+    html = """
+            <head><title>Title 1</title></head>
+            <body><time datetime="2018-10-09T01:03:32" /></body>
+    """
+    assert extract_head_metadata(html) == {"title": "Title 1", "date": "2018-10-09T01:03:32"}
+    assert extract_head_metadata("<h1 class='entry-title'>Title 2</h1>") == {"title": "Title 2", "date": None}
+
+
+def test_head_metadata_prefers_head_date_over_body():
+    html = """
+            <head><title>Title 1</title><meta property="article:modified_time" content="2020-01-01T00:00:00" /></head>
+            <body><time datetime="2018-10-09T01:03:32" /></body>
+    """
+    assert extract_head_metadata(html)["date"] == "2020-01-01T00:00:00"
+    # Looking at the whole document the body <time> scores higher
+    assert extract_date(html) == "2018-10-09T01:03:32"
+
+
+def test_compiled_xpaths_match_xpath_strings():
+    xpaths = [
+        ('//meta[@property="og:title"]/@content', 4),
+        ('//h1[@class="entry-title"]//text()', 3),
+        ('//meta[contains(@itemprop, "headline")]/@content', 2),
+        ('//meta[@name="title"]/@content', 1),
+        ('//meta[@property="og:title"]/@content', 1),
+    ]
+    html = """
+            <head>
+                <meta name="title" property="og:title" content="Title 1" />
+                <meta itemprop="headline" content="Title 2" />
+                <meta name="title" content="Title 2" />
+            </head>
+            <body><h1 class="entry-title">Title 2</h1></body>
+    """
+    lxml_html = parse_html(html)
+    expected = {
+        "Title 1": {"score": 6, "xpaths": sorted([xpaths[0][0], xpaths[3][0], xpaths[4][0]])},
+        "Title 2": {"score": 6, "xpaths": sorted([xpaths[1][0], xpaths[2][0], xpaths[3][0]])},
+    }
+    assert extract_element(lxml_html, CompiledXPaths(xpaths)) == extract_element(lxml_html, xpaths) == expected
@@ -1,4 +1,9 @@
+import json
+import os
+import subprocess
+
 from checks import check_extract_article
+from readabilipy.node_pool import JAVASCRIPT_DIR
 
 
 def test_extract_simple_article_with_readability_js():
@@ -15,3 +20,51 @@ def test_extract_article_from_page_with_readability_js():
         "addictinginfo.com-1_full_page_javascript.json",
         use_readability_js=True
     )
+
+
+def test_batch_mode_matches_single_documents(tmp_path):
+    # Assumes we're running on a system with Node/Readability.js installed
+    data_dir = os.path.join(os.path.dirname(__file__), "data")
+    inputs = [os.path.join(data_dir, filename) for filename in ["plain-content-test_full_article.html", "addictinginfo.com-1_full_page.html"]]
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("\n".join(inputs), encoding="utf-8")
+
+    cp = subprocess.run(["node", "ExtractArticle.js", "--batch", str(manifest), "--threads", "2"],
+                        cwd=JAVASCRIPT_DIR, stdout=subprocess.PIPE, check=True)
+    results = {result["id"]: result for result in map(json.loads, cp.stdout.decode("utf-8").splitlines())}
+
+    assert sorted(results) == sorted(inputs)
+    for input_path in inputs:
+        with open(input_path, encoding="utf-8") as h:
+            single = subprocess.run(["node", "ExtractArticle.js"], cwd=JAVASCRIPT_DIR, input=h.read().encode("utf-8"),
+                                    stdout=subprocess.PIPE, check=True)
+        assert results[input_path]["article"] == json.loads(single.stdout.decode("utf-8"))
+
+
+def test_batch_mode_reads_records_from_stdin():
+    # Assumes we're running on a system with Node/Readability.js installed
+    with open(os.path.join(os.path.dirname(__file__), "data", "plain-content-test_full_article.html"), encoding="utf-8") as h:
+        html = h.read()
+    records = [
+        json.dumps({"id": "article", "html": html}),
+        json.dumps({"html": html}),
+        "",
+        "Not JSON",
+        json.dumps({"id": 2, "html": None}),
+        json.dumps({"id": "no html"}),
+        json.dumps([html]),
+    ]
+    cp = subprocess.run(["node", "ExtractArticle.js", "--batch", "-", "--threads", "2"], cwd=JAVASCRIPT_DIR,
+                        input="\n".join(records).encode("utf-8"), stdout=subprocess.PIPE, check=True)
+    results = {json.dumps(result["id"]): result for result in map(json.loads, cp.stdout.decode("utf-8").splitlines())}
+
+    single = subprocess.run(["node", "ExtractArticle.js"], cwd=JAVASCRIPT_DIR, input=html.encode("utf-8"),
+                            stdout=subprocess.PIPE, check=True)
+    article = json.loads(single.stdout.decode("utf-8"))
+    assert results.pop(json.dumps("article")) == {"id": "article", "article": article}
+    # Records without an id must not be confused with the record whose id is 2
+    assert results.pop(json.dumps({"line": 2})) == {"id": {"line": 2}, "article": article}
+    assert sorted(results) == sorted(json.dumps(document_id) for document_id in [{"line": 4}, 2, "no html", {"line": 7}])
+    for result in results.values():
+        assert sorted(result) == ["error", "id"]
+        assert result["error"].startswith("Invalid NDJSON record: ")
@@ -0,0 +1,147 @@
+import io
+import json
+import os
+import shutil
+
+import pytest
+
+from readabilipy.__main__ import LatencySample, main, percentile
+from readabilipy import simple_json_from_html_string
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+FILENAMES = ["addictinginfo.com-1_full_page.html", "list_items_full_page.html", "non_article_full_page.html"]
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    directory = tmp_path / "input"
+    (directory / "sub").mkdir(parents=True)
+    for filename in FILENAMES[:2]:
+        shutil.copy(os.path.join(DATA_DIR, filename), directory / filename)
+    shutil.copy(os.path.join(DATA_DIR, FILENAMES[2]), directory / "sub" / FILENAMES[2])
+    (directory / "notes.txt").write_text("Not HTML")
+    return directory
+
+
+def expected_article(filename):
+    with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as h:
+        return simple_json_from_html_string(h.read(), fields=["title", "plain_text"])
+
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr("sys.argv", ["readabilipy"] + list(args) + ["-p", "-w", "1", "-f", "title", "plain_text"])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    return exit_info.value.code
+
+
+def test_batch_ndjson(monkeypatch, capsys, input_dir):
+    missing = str(input_dir / "missing.html")
+    assert run(monkeypatch, str(input_dir), missing) == 1
+    captured = capsys.readouterr()
+    results = {result["id"]: result for result in map(json.loads, captured.out.splitlines())}
+    assert results[str(input_dir / FILENAMES[0])]["article"] == expected_article(FILENAMES[0])
+    assert results[str(input_dir / "sub" / FILENAMES[2])]["article"] == expected_article(FILENAMES[2])
+    assert results[missing]["error"].startswith("FileNotFoundError")
+    assert len(results) == 4
+    assert "Extracted 3 of 4 documents" in captured.err
+
+
+def test_batch_output_dir(monkeypatch, capsys, input_dir, tmp_path):
+    output_dir = tmp_path / "output"
+    assert run(monkeypatch, str(input_dir / "*.html"), "--output-dir", str(output_dir)) == 0
+    assert sorted(os.listdir(output_dir)) == sorted(os.path.splitext(filename)[0] + ".json" for filename in FILENAMES[:2])
+    with open(output_dir / "list_items_full_page.json", encoding="utf-8") as h:
+        assert json.load(h) == expected_article(FILENAMES[1])
+    assert "Extracted 2 of 2 documents" in capsys.readouterr().err
+
+
+def test_batch_output_dir_keeps_subdirectories(monkeypatch, capsys, tmp_path):
+    for subdirectory, filename in zip("ab", FILENAMES):
+        (tmp_path / "archive" / subdirectory).mkdir(parents=True)
+        shutil.copy(os.path.join(DATA_DIR, filename), tmp_path / "archive" / subdirectory / "index.html")
+    monkeypatch.chdir(tmp_path)
+    assert run(monkeypatch, "archive/**/*.html", "--output-dir", "output") == 0
+    for subdirectory, filename in zip("ab", FILENAMES):
+        with open(tmp_path / "output" / subdirectory / "index.json", encoding="utf-8") as h:
+            assert json.load(h) == expected_article(filename)
+    assert "Extracted 2 of 2 documents" in capsys.readouterr().err
+
+
+def test_batch_output_dir_does_not_overwrite(monkeypatch, capsys, tmp_path):
+    for subdirectory, filename in zip("ab", FILENAMES):
+        (tmp_path / subdirectory).mkdir()
+        shutil.copy(os.path.join(DATA_DIR, filename), tmp_path / subdirectory / "index.html")
+    output_dir = tmp_path / "output"
+    assert run(monkeypatch, str(tmp_path / "a" / "index.html"), str(tmp_path / "b" / "index.html"), "--output-dir", str(output_dir)) == 1
+    with open(output_dir / "index.json", encoding="utf-8") as h:
+        assert json.load(h) == expected_article(FILENAMES[0])
+    captured = capsys.readouterr()
+    assert f"{tmp_path / 'b' / 'index.html'}: FileExistsError" in captured.err
+    assert "Extracted 1 of 2 documents" in captured.err
+
+
+def test_ndjson_stream(monkeypatch, capsys):
+    records = []
+    for filename in FILENAMES:
+        with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as h:
+            records.append(json.dumps({"id": filename, "html": h.read()}))
+    records += [
+        "",
+        "Not JSON",
+        json.dumps({"html": "<title>Title</title>"}),
+        json.dumps({"id": 6, "html": None}),
+        json.dumps({"id": "no html"}),
+        json.dumps(["html"]),
+    ]
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(records) + "\n"))
+    assert run(monkeypatch, "--ndjson") == 1
+    captured = capsys.readouterr()
+    results = {json.dumps(result["id"]): result for result in map(json.loads, captured.out.splitlines())}
+    assert results == {
+        **{json.dumps(filename): {"id": filename, "article": expected_article(filename)} for filename in FILENAMES},
+        '{"line": 6}': {"id": {"line": 6}, "article": simple_json_from_html_string("<title>Title</title>", fields=["title", "plain_text"])},
+        **{json.dumps(document_id): {"id": document_id, "error": results[json.dumps(document_id)]["error"]} for document_id in [{"line": 5}, 6, "no html", {"line": 9}]},
+    }
+    assert results['{"line": 5}']["error"].startswith("ValueError: Invalid NDJSON record")
+    assert results["6"]["error"] == 'ValueError: Invalid NDJSON record: "html" is missing or not a string'
+    assert "Extracted 4 of 8 documents" in captured.err
+
+
+def test_percentile():
+    assert percentile([1, 2, 3, 4], 0.5) == 3
+    assert percentile(list(range(100)), 0.99) == 99
+    assert percentile([5], 0.99) == 5
+
+
+def test_latency_sample_is_bounded():
+    latencies = LatencySample(size=100)
+    for latency in range(10000):
+        latencies.add(latency)
+    assert latencies.count == 10000
+    assert len(latencies.values) == 100
+    assert len(set(latencies.values)) == 100
+    # A uniform sample of 0-9999 should have its median somewhere near the middle
+    assert 2500 < percentile(sorted(latencies.values), 0.5) < 7500
+
+
+@pytest.mark.parametrize("options, content_digests", [(["-cn"], True), (["--digest-algorithm", "blake2b-16", "-n"], "blake2b-16")])
+def test_content_digest_options(monkeypatch, tmp_path, options, content_digests):
+    html_file = os.path.join(DATA_DIR, FILENAMES[1])
+    with open(html_file, encoding="utf-8") as h:
+        html = h.read()
+    output_file = tmp_path / "article.json"
+    monkeypatch.setattr("sys.argv", ["readabilipy", "-p", "-i", html_file, "-o", str(output_file), "-f", "plain_content"] + options)
+    main()
+    expected = simple_json_from_html_string(html, content_digests=content_digests, node_indexes=True, fields=["plain_content"])
+    with open(output_file, encoding="utf-8") as h:
+        assert json.load(h) == expected
+
+
+def test_unsupported_digest_algorithm(monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["readabilipy", "-p", "-i", os.path.join(DATA_DIR, FILENAMES[1]), "--digest-algorithm", "nope"])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 2
+    assert "Unsupported content digest algorithm 'nope'" in capsys.readouterr().err
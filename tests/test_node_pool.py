@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+
+import pytest
+from readabilipy import AsyncNodeWorkerPool, NodeWorkerPool, simple_json_from_html_string, simple_json_from_html_string_async
+from readabilipy.node_pool import NodeWorkerError, NodeWorkerTimeoutError
+
+
+def read_test_data(filename):
+    with open(os.path.join(os.path.dirname(__file__), "data", filename), encoding="utf-8") as h:
+        return h.read()
+
+
+def test_pool_size_must_be_positive():
+    with pytest.raises(ValueError):
+        NodeWorkerPool(size=0)
+
+
+def test_closed_pool_refuses_work():
+    pool = NodeWorkerPool()
+    pool.close()
+    with pytest.raises(NodeWorkerError):
+        pool.extract("<p>Text</p>")
+
+
+def test_pool_matches_single_shot_readability_js():
+    # Assumes we're running on a system with Node/Readability.js installed
+    html = read_test_data("plain-content-test_full_article.html")
+    expected = json.loads(read_test_data("plain-content-test_full_article_javascript.json"))
+    with NodeWorkerPool(size=2) as pool:
+        # Repeat so that the same worker is reused across calls
+        for _ in range(3):
+            assert simple_json_from_html_string(html, use_readability=True, node_pool=pool) == expected
+
+
+def test_pool_reuses_workers():
+    # Assumes we're running on a system with Node/Readability.js installed
+    with NodeWorkerPool(size=1) as pool:
+        pool.extract("<p>First</p>")
+        worker = pool._idle.get_nowait()  # pylint: disable=protected-access
+        pool._idle.put(worker)  # pylint: disable=protected-access
+        pool.extract("<p>Second</p>")
+        assert pool._idle.get_nowait() is worker  # pylint: disable=protected-access
+
+
+def test_async_pool_matches_single_shot_readability_js():
+    # Assumes we're running on a system with Node/Readability.js installed
+    html = read_test_data("plain-content-test_full_article.html")
+    expected = json.loads(read_test_data("plain-content-test_full_article_javascript.json"))
+
+    async def extract_all():
+        async with AsyncNodeWorkerPool(size=2) as pool:
+            return await asyncio.gather(*[simple_json_from_html_string_async(html, use_readability=True, node_pool=pool) for _ in range(4)])
+
+    loop = asyncio.new_event_loop()
+    assert loop.run_until_complete(extract_all()) == [expected] * 4
+    loop.close()
+
+
+def test_async_single_shot_matches_sync():
+    # Assumes we're running on a system with Node/Readability.js installed
+    html = read_test_data("plain-content-test_full_article.html")
+    loop = asyncio.new_event_loop()
+    result = loop.run_until_complete(simple_json_from_html_string_async(html, use_readability=True))
+    loop.close()
+    assert result == simple_json_from_html_string(html, use_readability=True)
+
+
+def test_pool_timeout_kills_and_replaces_worker():
+    # Assumes we're running on a system with Node/Readability.js installed
+    html = read_test_data("benchmarkinghuge.html")
+    with NodeWorkerPool(size=1, timeout=0.001) as pool:
+        with pytest.raises(TimeoutError):
+            pool.extract(html)
+        assert pool._idle.empty()  # pylint: disable=protected-access
+        # The next document gets a fresh worker
+        pool.extract("<p>Text</p>", timeout=60)
+
+
+def test_single_shot_timeout():
+    # Assumes we're running on a system with Node/Readability.js installed
+    html = read_test_data("benchmarkinghuge.html")
+    with pytest.raises(NodeWorkerTimeoutError):
+        simple_json_from_html_string(html, use_readability=True, timeout=0.001)
+
+
+class FinishedWorker:
+    """Stand-in for a live worker which has processed some documents."""
+
+    def __init__(self, documents, rss):
+        self.documents = documents
+        self.rss = rss
+
+    def is_alive(self):
+        return True
+
+
+@pytest.mark.parametrize("limits, reusable", [
+    ({}, True),
+    ({"max_documents": 10}, True),
+    ({"max_documents": 3}, False),
+    ({"max_rss": 200}, True),
+    ({"max_rss": 100}, False),
+])
+def test_pool_recycles_workers(limits, reusable):
+    pool = NodeWorkerPool(**limits)
+    worker = FinishedWorker(documents=3, rss=150 * 1024 * 1024)
+    assert pool._reusable(worker) == reusable  # pylint: disable=protected-access
+
+
+def test_async_pool_timeout():
+    # Assumes we're running on a system with Node/Readability.js installed
+    html = read_test_data("benchmarkinghuge.html")
+
+    async def extract_slowly():
+        async with AsyncNodeWorkerPool(size=1, timeout=0.001) as pool:
+            with pytest.raises(NodeWorkerTimeoutError):
+                await pool.extract(html)
+            return await pool.extract("<p>Text</p>", timeout=60)
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(extract_slowly())
+    loop.close()
@@ -1,12 +1,22 @@
 
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import CompletedProcess
 from unittest import mock
 
+import pytest
+
 # from .checks import check_extract_article
 from bs4 import BeautifulSoup
-from readabilipy import simple_json_from_html_string
+from readabilipy import ArticleResult, simple_json_from_html_string, simple_json_from_html_string_async, simple_json_from_html_strings
 from readabilipy.simplifiers import normalise_text
 from readabilipy.simple_json import plain_element, plain_text_leaf_node, add_node_indexes, content_digest, have_node
+from readabilipy.simple_json import article_json_from_input, plain_content, python_json
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
 
 def test_empty_page():
@@ -94,6 +104,121 @@ def test_content_digest_assignment():
                        '']
 
 
+def test_content_digests_of_nested_elements():
+    """Digests added in one pass should match hashing each element's subtree separately."""
+    html = "<div>" + "<div><p>Some <b>text</b></p>Some bare text<ul><li>item</li></ul>" * 20 + "</div>" * 20 + "</div>"
+    soup = BeautifulSoup(plain_content(html, True, False), "html.parser")
+    for element in soup.find_all():
+        assert element["data-content-digest"] == content_digest(element)
+
+
+def test_content_digest_algorithm():
+    html = "<div><p>Text</p><p>More text</p></div>"
+    article = simple_json_from_html_string(html, content_digests="blake2b-16")
+    soup = BeautifulSoup(article["plain_content"], "html.parser")
+    assert soup.find("p")["data-content-digest"] == hashlib.blake2b(b"Text", digest_size=16).hexdigest()
+    assert all(len(element["data-content-digest"]) == 32 for element in soup.find_all())
+    # The default is unchanged
+    assert simple_json_from_html_string(html, content_digests="sha256") == simple_json_from_html_string(html, content_digests=True)
+
+
+@pytest.mark.parametrize("algorithm", ["nope", "blake2b-99", "shake_128", "sha256-16"])
+def test_unsupported_content_digest_algorithm(algorithm):
+    with pytest.raises(ValueError):
+        simple_json_from_html_string("<p>Text</p>", content_digests=algorithm)
+
+
+@pytest.mark.parametrize("fields", [["title", "date"], ["plain_text"], ["plain_content", "title"], ["content"]])
+def test_fields_match_full_article(fields):
+    with open(os.path.join(DATA_DIR, "addictinginfo.com-1_full_article.html"), encoding="utf-8") as h:
+        html = h.read()
+    full = simple_json_from_html_string(html, content_digests=True, node_indexes=True)
+    article = simple_json_from_html_string(html, content_digests=True, node_indexes=True, fields=fields)
+    assert article == {field: full[field] for field in fields}
+
+
+def test_metadata_fields_skip_simplification():
+    with mock.patch("readabilipy.simple_json.simple_tree_from_html_string") as simple_tree:
+        article = simple_json_from_html_string("<html><head><title>Title</title></head></html>", fields=["title"])
+    assert article == {"title": "Title"}
+    simple_tree.assert_not_called()
+
+
+def test_unknown_field():
+    with pytest.raises(ValueError):
+        simple_json_from_html_string("<p>Text</p>", fields=["title", "summary"])
+
+
+@pytest.mark.parametrize("fields", [None, ["plain_text"], ["content", "plain_text"], ["plain_content", "plain_text"]])
+def test_lazy_article_matches_dict(fields):
+    with open(os.path.join(DATA_DIR, "addictinginfo.com-1_full_article.html"), encoding="utf-8") as h:
+        html = h.read()
+    article = simple_json_from_html_string(html, content_digests=True, node_indexes=True, fields=fields)
+    lazy = simple_json_from_html_string(html, content_digests=True, node_indexes=True, fields=fields, lazy=True)
+    assert isinstance(lazy, ArticleResult)
+    # Access the fields in reverse order to check that they do not depend on each other
+    for field in reversed(list(article)):
+        assert lazy[field] == article[field]
+    assert dict(lazy) == article
+
+
+def test_lazy_article_metadata_skips_plain_content():
+    with mock.patch("readabilipy.simple_json.plain_content_tree") as plain_content_tree:
+        article = simple_json_from_html_string("<html><head><title>Title</title></head><body><p>Text</p></body></html>", lazy=True)
+        assert article["title"] == "Title"
+        plain_content_tree.assert_not_called()
+    assert "plain_text" in article
+    article = simple_json_from_html_string("<p>Text</p>", fields=["title"], lazy=True)
+    with pytest.raises(KeyError):
+        assert article["content"]
+
+
+@pytest.mark.parametrize("workers, chunksize", [(1, 1), (2, 1), (2, 3)])
+def test_batch_matches_single_documents(workers, chunksize):
+    htmls = []
+    for filename in ["addictinginfo.com-1_full_page.html", "list_items_full_page.html", "non_article_full_page.html"]:
+        with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as h:
+            htmls.append(h.read())
+    htmls = htmls * 2
+    expected = [simple_json_from_html_string(html, content_digests=True) for html in htmls]
+    assert list(simple_json_from_html_strings(htmls, workers, chunksize, content_digests=True)) == expected
+    unordered = dict(simple_json_from_html_strings(iter(htmls), workers, chunksize, ordered=False, content_digests=True))
+    assert [unordered[index] for index in range(len(htmls))] == expected
+
+
+def test_batch_return_exceptions():
+    def extract(html, **kwargs):
+        if html == "bad":
+            raise ValueError(html)
+        return {"title": html, **kwargs}
+
+    with mock.patch("readabilipy.simple_json.simple_json_from_html_string", side_effect=extract):
+        articles = list(simple_json_from_html_strings(["a", "bad", "c"], workers=1, chunksize=2, return_exceptions=True))
+        assert articles[0] == {"title": "a"} and articles[2] == {"title": "c"}
+        assert isinstance(articles[1], ValueError)
+        with pytest.raises(ValueError):
+            list(simple_json_from_html_strings(["a", "bad", "c"], workers=1))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_reuses_node_workers(workers):
+    with mock.patch("readabilipy.simple_json.have_node", return_value=True), \
+            mock.patch("readabilipy.simple_json.readability_js_json") as readability_js_json, \
+            mock.patch("readabilipy.simple_json.NodeWorkerPool") as node_worker_pool:
+        node_worker_pool.return_value.available.return_value = True
+        node_worker_pool.return_value.extract.return_value = {"title": "Title", "content": "<p>Text</p>"}
+        articles = list(simple_json_from_html_strings(["<p>Text</p>"] * 3, workers, use_readability=True, fields=["title", "plain_text"]))
+    assert articles == [{"title": "Title", "plain_text": [{"text": "Text"}]}] * 3
+    node_worker_pool.assert_called_once_with(size=workers)
+    node_worker_pool.return_value.close.assert_called_once_with()
+    readability_js_json.assert_not_called()
+
+
+def test_batch_checks_arguments_first():
+    with pytest.raises(ValueError):
+        next(simple_json_from_html_strings(["<p>Text</p>"], workers=2, fields=["summary"]))
+
+
 @mock.patch('subprocess.run')
 def test_have_node_1(mock_subprocess_run):
     mock_subprocess_run.side_effect = FileNotFoundError("No such file or directory: 'node'")
@@ -121,3 +246,53 @@ def test_have_node_4(mock_os_path_exists):
 def test_have_node_5():
     # Assumes we're running on a system with Node/Readability.js installed
     assert have_node()
+
+
+def test_async_matches_sync():
+    """The asyncio entry point should give exactly the same output as the synchronous one."""
+    html = """
+        <html>
+            <head><title>Title</title></head>
+            <body><div><p>Some text</p><ul><li>Item</li></ul></div></body>
+        </html>
+    """.strip()
+
+    async def extract_both(executor):
+        return await asyncio.gather(
+            simple_json_from_html_string_async(html, content_digests=True, executor=executor),
+            simple_json_from_html_string_async(html, node_indexes=True),
+        )
+
+    loop = asyncio.new_event_loop()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = loop.run_until_complete(extract_both(executor))
+    loop.close()
+    assert results == [
+        simple_json_from_html_string(html, content_digests=True),
+        simple_json_from_html_string(html, node_indexes=True),
+    ]
+
+
+@pytest.mark.parametrize("parser", ["html5lib", "lxml"])
+@pytest.mark.parametrize("filename", sorted(f for f in os.listdir(DATA_DIR) if f.endswith(".html")))
+def test_simplified_tree_matches_reparsed_content(filename, parser):
+    """Using the simplified tree directly should give the same output as serialising it and parsing it again."""
+    with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as h:
+        html = h.read()
+    input_json = python_json(html, parser)
+    content = str(input_json["content"])
+    from_tree = article_json_from_input(input_json, True, True, False)
+    from_html = article_json_from_input(dict(input_json, content=content), True, True, False)
+    assert from_tree == from_html
+
+
+@pytest.mark.parametrize("html", [
+    "<p>a<span></span>b</p><p>c</p>",
+    "<div><ruby>x<rt>y</rt></ruby><p>z<rt>w</rt></p></div>",
+    "<pre>  </pre><p>a<i> </i>b</p>",
+])
+def test_simplified_tree_strings_match_reparsed_content(html):
+    input_json = python_json(html, "lxml")
+    content = str(input_json["content"])
+    from_tree = article_json_from_input(input_json, True, True, False)
+    assert from_tree == article_json_from_input(dict(input_json, content=content), True, True, False)
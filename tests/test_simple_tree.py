@@ -1,4 +1,5 @@
 """Tests for simple_tree functions."""
+import pytest
 from readabilipy import simple_tree_from_html_string
 from readabilipy.simplifiers import strip_html_whitespace
 
@@ -26,3 +27,8 @@ def test_remove_cdata():
     parsed_html = str(simple_tree_from_html_string(html))
     expected_output = "<div><div><p>Some text</p></div><p>//</p></div>"
     assert strip_html_whitespace(parsed_html) == expected_output
+
+
+def test_unknown_parser():
+    with pytest.raises(ValueError):
+        simple_tree_from_html_string("<p>Text</p>", parser="not-a-parser")
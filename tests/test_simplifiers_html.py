@@ -1,8 +1,15 @@
 """Tests for plain_html functions."""
+import os
+import time
+
+import pytest
 from bs4 import BeautifulSoup
 from readabilipy.simplifiers import html
 
 
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
 def test_remove_metadata():
     HTML = """
         <!DOCTYPE html>
@@ -30,3 +37,67 @@ def test_remove_blacklist():
     soup = BeautifulSoup(HTML, "html5lib")
     html.remove_blacklist(soup)
     assert "button" not in str(soup)
+
+
+@pytest.mark.parametrize("parser", ["html5lib", "lxml"])
+@pytest.mark.parametrize("filename", sorted(f for f in os.listdir(DATA_DIR) if f.endswith(".html")))
+def test_clean_elements_matches_separate_passes(filename, parser):
+    with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as h:
+        HTML = h.read()
+    soup_separate = BeautifulSoup(HTML, parser)
+    for clean in [html.remove_metadata, html.strip_attributes, html.remove_blacklist, html.unwrap_elements, html.process_special_elements, html.process_unknown_elements]:
+        clean(soup_separate)
+    soup_fused = BeautifulSoup(HTML, parser)
+    html.clean_elements(soup_fused)
+    assert str(soup_fused) == str(soup_separate)
+    # Check the string nodes line up too, as later stages merge consecutive strings
+    assert [type(s) for s in soup_fused.descendants] == [type(s) for s in soup_separate.descendants]
+
+
+@pytest.mark.parametrize("HTML, expected", [
+    ("<p>a<div>b</div>c<div>d</div>e</p>", "<p>a</p><div>b</div><p>c</p><div>d</div><p>e</p>"),
+    ("<p>a<div>b</div><div>c</div></p>", "<p>a</p><div>b</div><p></p><div>c</div><p></p>"),
+    ("<p>x<span>y</span>z<ul><li>w</li></ul></p>", "<p></p><li>w</li><p></p>"),
+    ('<p id="x">a<span>b<div>c</div>d</span><div>e</div>f</p>', "<p>b</p><div>c</div><p>d</p>"),
+    ("<p>a<ul><li>b<p>c<div>d</div></p></li></ul>e</p>", "<p>c</p><div>d</div><p></p>"),
+])
+def test_unnest_paragraphs(HTML, expected):
+    soup = BeautifulSoup(HTML, "html.parser")
+    html.unnest_paragraphs(soup)
+    assert str(soup) == expected
+
+
+@pytest.mark.parametrize("HTML, expected", [
+    ("<div><div><span></span></div></div><p>x</p>", "<p>x</p>"),
+    ("<div><p></p>text<b><i></i></b></div>", "<div>text</div>"),
+    ("<div>" * 500 + "</div>" * 500, ""),
+])
+def test_recursively_prune_elements(HTML, expected):
+    soup = BeautifulSoup(HTML, "html.parser")
+    html.recursively_prune_elements(soup)
+    assert str(soup) == expected
+
+
+def best_time(function, HTML, repeats=3):
+    """Best time taken by function on a fresh soup of HTML."""
+    timings = []
+    for _ in range(repeats):
+        soup = BeautifulSoup(HTML, "html.parser")
+        start = time.perf_counter()
+        function(soup)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@pytest.mark.parametrize("function, HTML, expected", [
+    (html.unnest_paragraphs, "<p>a<div>b</div>c</p>", "<p>a</p><div>b</div><p>c</p>"),
+    (html.recursively_prune_elements, "<p>x</p><div><div></div></div>", "<p>x</p>"),
+])
+def test_many_sibling_paragraphs_scale_linearly(function, HTML, expected):
+    soup = BeautifulSoup("<div>" + HTML * 5000 + "</div>", "html.parser")
+    function(soup)
+    assert str(soup) == "<div>" + expected * 5000 + "</div>"
+    # Searches follow the parse order links, so check these were kept in step with the tree
+    assert [str(element) for element in soup.find_all(True)] == [str(element) for element in BeautifulSoup(str(soup), "html.parser").find_all(True)]
+    # Eight times the paragraphs should take around eight times as long, not sixty-four
+    assert best_time(function, "<div>" + HTML * 8000 + "</div>") < 24 * best_time(function, "<div>" + HTML * 1000 + "</div>")
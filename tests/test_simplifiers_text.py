@@ -1,7 +1,8 @@
-from pytest import mark
+from pytest import fixture, mark, raises
 from checks import check_exact_html_output
 
-from readabilipy.simplifiers import normalise_text, normalise_unicode, normalise_whitespace, strip_control_characters, strip_html_whitespace
+from readabilipy.simplifiers import normalise_text, normalise_texts, normalise_unicode, normalise_whitespace, strip_control_characters, strip_html_whitespace
+from readabilipy.simplifiers import configure_text_cache, text_cache_info
 from readabilipy.simplifiers import text
 
 
@@ -68,6 +69,62 @@ def test_strip_control_characters_tab():
     assert normalise_text(unnormalised_string) == "A string with tabs included"
 
 
+def test_strip_control_characters_ascii():
+    unnormalised_string = "\x00A string with\x0b ASCII\x1f control\x7f characters\x1c"
+    assert strip_control_characters(unnormalised_string) == "A string with ASCII control characters"
+    assert normalise_text(unnormalised_string) == "A string with ASCII control characters"
+
+
+@mark.parametrize('unnormalised_string', ["", " ", "\t\n", "plain ascii", "  Ame\u0301lie\u00a0 \u2028Poulain ", "\ufb01\u2163\u3000x\u0085"])
+def test_normalise_text_fast_path_matches_full_normalisation(unnormalised_string):
+    expected = normalise_whitespace(normalise_unicode(strip_control_characters(unnormalised_string)))
+    assert normalise_text(unnormalised_string) == expected
+
+
+@mark.parametrize('texts', [
+    [],
+    [""],
+    ["  Ame\u0301lie  ", "\u0301 combining mark", "\t\n", "with\u200bin\ufeff"],
+    ["Hangul \u1100", "\u1161 jamo", "\ufb01 ligature\u3000"],
+    ["contains the \ue000 separator", "x"],
+])
+def test_normalise_texts_matches_normalise_text(texts):
+    assert normalise_texts(texts) == [normalise_text(t) for t in texts]
+
+
+@fixture
+def text_cache():
+    text.text_cache.clear()
+    configure_text_cache(2)
+    yield
+    configure_text_cache(0)
+    text.text_cache.clear()
+
+
+def test_text_cache_counts_hits_and_misses(text_cache):  # pylint: disable=redefined-outer-name,unused-argument
+    assert normalise_text(" Share\u00a0this ") == "Share this"
+    assert normalise_text(" Share\u00a0this ") == "Share this"
+    assert normalise_texts([" Share\u00a0this ", "Cookies "]) == ["Share this", "Cookies"]
+    assert text_cache_info() == {"hits": 2, "misses": 2, "maxsize": 2, "size": 2}
+
+
+def test_text_cache_evicts_least_recently_used(text_cache):  # pylint: disable=redefined-outer-name,unused-argument
+    normalise_texts(["a ", "b ", "a ", "c "])
+    assert text_cache_info()["size"] == 2
+    # "b " was the least recently used text so it has been evicted
+    normalise_text("a ")
+    normalise_text("b ")
+    assert text_cache_info()["hits"] == 1
+    assert text_cache_info()["misses"] == 5
+
+
+def test_text_cache_disabled_by_default():
+    normalise_text("not cached")
+    assert text_cache_info() == {"hits": 0, "misses": 0, "maxsize": 0, "size": 0}
+    with raises(ValueError):
+        configure_text_cache(-1)
+
+
 # Test whitespace around tags
 @mark.parametrize('terminal_punctuation', text.terminal_punctuation_marks)
 def test_ensure_correct_punctuation_joining(terminal_punctuation):
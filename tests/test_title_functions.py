@@ -1,6 +1,6 @@
 import pytest
 from readabilipy.extractors.extract_title import extract_title
-from readabilipy.extractors.extract_title import combine_similar_titles
+from readabilipy.extractors.extract_title import combine_similar_titles, containing_titles
 
 
 htmls_with_expected = [
@@ -87,3 +87,28 @@ def test_combine_similar_titles():
     expected_output['Title 1 - Extended'] = {'score': 1, 'xpaths': ['c']}
 
     assert combine_similar_titles(extracted_strings) == expected_output
+
+
+def test_combine_similar_titles_uses_combined_scores_of_earlier_titles():
+
+    extracted_strings = {}
+    extracted_strings['Title 1'] = {'score': 2, 'xpaths': ['b']}
+    extracted_strings['Title'] = {'score': 1, 'xpaths': ['a']}
+    extracted_strings['Title 1 - Extended'] = {'score': 4, 'xpaths': ['c']}
+
+    # 'Title 1' has already been combined with 'Title 1 - Extended' when it is added to 'Title'
+    expected_output = {}
+    expected_output['Title 1'] = {'score': 6, 'xpaths': ['b', 'c']}
+    expected_output['Title'] = {'score': 11, 'xpaths': ['a', 'b', 'c', 'c']}
+    expected_output['Title 1 - Extended'] = {'score': 4, 'xpaths': ['c']}
+
+    assert combine_similar_titles(extracted_strings) == expected_output
+
+
+@pytest.mark.parametrize("titles", [
+    ["ab", "b", "abab", "c", "bc"],
+    ["a\nb", "b", "a", "c"],
+])
+def test_containing_titles(titles):
+    expected = [{j for j, other in enumerate(titles) if j != i and title in other} for i, title in enumerate(titles)]
+    assert containing_titles(titles) == expected